@@ -1,6 +1,10 @@
 # config.py - 在线放映室配置文件
 import random
 import os
+from fractions import Fraction
+from math import gcd
+from dataclasses import dataclass
+from types import MappingProxyType
 
 # 应用基本信息
 APP_NAME = "在线放映室"
@@ -39,15 +43,27 @@ WINDOW_SIZES = {
 }
 
 # 角色名称池
-ROLE_NAMES = ["Archer", "Saber", "Caster", "Assassin", "Rider", "Lancer", "Berserker"]
-RARE_ROLE_NAMES = ["Ruler", "Avenger"]  # 极小概率出现
+ROLE_NAMES = ("Archer", "Saber", "Caster", "Assassin", "Rider", "Lancer", "Berserker")
+RARE_ROLE_NAMES = ("Ruler", "Avenger")  # 极小概率出现
 RARE_ROLE_PROBABILITY = 0.02  # 2%概率出现稀有角色
 
+# 昵称专用随机数生成器（导入时由系统熵源播种一次）
+_RNG = random.Random()
+
+def _build_name_pool() -> tuple:
+    """按稀有角色概率构建加权昵称表（每个名字重复相应次数），抽样时只需一次choice"""
+    p = Fraction(RARE_ROLE_PROBABILITY).limit_denominator(10000)
+    # 稀有角色合计占比 n_rare*w_rare / (n_rare*w_rare + n_roles*w_role) = p
+    rare_weight = p.numerator * len(ROLE_NAMES)
+    role_weight = (p.denominator - p.numerator) * len(RARE_ROLE_NAMES)
+    divisor = gcd(rare_weight, role_weight)
+    return ROLE_NAMES * (role_weight // divisor) + RARE_ROLE_NAMES * (rare_weight // divisor)
+
+_NAME_POOL = _build_name_pool()
+
 def get_random_nickname():
     """获取随机昵称"""
-    if random.random() < RARE_ROLE_PROBABILITY:
-        return random.choice(RARE_ROLE_NAMES)
-    return random.choice(ROLE_NAMES)
+    return _RNG.choice(_NAME_POOL)
 
 # 网络默认配置
 NETWORK_DEFAULTS = {
@@ -59,10 +75,39 @@ NETWORK_DEFAULTS = {
     "enable_local_play": True,    # 默认开启本地播放
     "prefer_ipv6": True,          # 优先使用IPv6
     "connection_timeout": 10,     # 连接超时时间(秒)
-    "reconnect_interval": 3,      # 重连间隔(秒)
-    "max_reconnect_attempts": 5   # 最大重连次数
+    "reconnect_interval": 3,      # 重连初始间隔(秒)，之后按指数退避
+    "max_reconnect_interval": 30, # 重连最大间隔(秒)
+    "max_reconnect_attempts": 5,  # 最大重连次数
+    "heartbeat_interval": 30,     # 空闲多久后发送心跳(秒)
+    "heartbeat_check_interval": 5, # 心跳空闲检查间隔(秒)
+    "websocket_compression": None, # WebSocket压缩（None关闭permessage-deflate，聊天消息很小，压缩得不偿失）
+    "websocket_max_size": 65536,  # 单条WebSocket消息最大字节数（收发双方一致，超过时连接以1009关闭）
+    "max_chat_length": 4000,      # 聊天消息最大字符数（JSON编码后远小于websocket_max_size）
+    "low_latency_mode": False     # 低延迟模式（缩短探测窗口、关闭播放端缓存）
 }
 
+# 会话配置（由设置界面生成，启动后不再修改）
+@dataclass(frozen=True)
+class SenderConfig:
+    """发送端配置"""
+    __slots__ = ("bind_ip", "srt_port", "ws_port", "nickname", "verification_code", "enable_local_play")
+    bind_ip: str
+    srt_port: int
+    ws_port: int
+    nickname: str
+    verification_code: str
+    enable_local_play: bool
+
+
+@dataclass(frozen=True)
+class ReceiverConfig:
+    """接收端配置"""
+    __slots__ = ("server_ip", "server_port", "nickname", "verification_code")
+    server_ip: str
+    server_port: int
+    nickname: str
+    verification_code: str
+
 # 外部程序路径
 EXTERNAL_PROGRAMS = {
     "ffmpeg": os.path.join(".", "ffmpeg.exe"),
@@ -93,36 +138,60 @@ FFMPEG_PARAMS = {
     },
     
     # SRT转RTMP（发送端接收流后推送到本地RTMP）
-    "srt_to_rtmp": [
-        "-analyzeduration", "10000000",  # 分析时长10秒
-        "-probesize", "10000000",        # 探测大小10MB
-        "-fflags", "+genpts",            # 生成PTS避免时间戳问题
-        "-i", "srt://0.0.0.0:{port}?mode=listener&latency=120",
-        "-c", "copy",           # 不转码，只转封装
-        "-f", "flv",           # 输出格式为FLV
-        "-flvflags", "no_duration_filesize",
-        "rtmp://127.0.0.1:1935/live/stream"
-    ],
+    # 命令按 通用参数 + input + "-i 输入地址" + output + 输出地址 拼接
+    "srt_to_rtmp": {
+        "input": (
+            "-analyzeduration", "10000000",  # 分析时长10秒
+            "-probesize", "10000000",        # 探测大小10MB
+            "-fflags", "+genpts",            # 生成PTS避免时间戳问题
+        ),
+        "output": (
+            "-c", "copy",           # 不转码，只转封装
+            "-f", "flv",           # 输出格式为FLV
+            "-flvflags", "no_duration_filesize",
+        ),
+    },
     
     # RTMP转SRT（为每个客户端分发）
-    "rtmp_to_srt": [
-        "-analyzeduration", "5000000",   # 分析时长5秒（RTMP相对稳定）
-        "-probesize", "5000000",         # 探测大小5MB
-        "-fflags", "+genpts",            # 生成PTS避免时间戳问题
-        "-re",                  # 按原始帧率读取
-        "-i", "rtmp://127.0.0.1:1935/live/stream",
-        "-c", "copy",           # 不转码，只转封装
-        "-f", "mpegts",        # SRT使用MPEG-TS封装
-        "srt://0.0.0.0:{port}?mode=listener&latency=120"
-    ],
+    "rtmp_to_srt": {
+        "input": (
+            "-analyzeduration", "5000000",   # 分析时长5秒（RTMP相对稳定）
+            "-probesize", "5000000",         # 探测大小5MB
+            "-fflags", "+genpts",            # 生成PTS避免时间戳问题
+            # 不使用-re：RTMP直播源本身按实时速率推送，无需再按帧率节流
+        ),
+        "output": (
+            "-c", "copy",           # 不转码，只转封装
+            "-f", "mpegts",        # SRT使用MPEG-TS封装
+        ),
+    },
+    
+    # 低延迟模式下追加到输入参数之后（覆盖前面的探测设置）
+    "low_latency_input": (
+        "-analyzeduration", "500000",    # 分析时长0.5秒
+        "-probesize", "500000",          # 探测大小500KB
+        "-fflags", "nobuffer+genpts",    # 不缓冲输入
+        "-flags", "low_delay",
+    ),
+    
+    # 需要检测就绪时追加（输入流信息在info级别输出）
+    "ready_detect": (
+        "-loglevel", "info",
+    ),
+    # 出现以下任一标记即认为输入已打开、输出即将监听
+    "ready_markers": ("Input #0", "Output #0"),
     
     # 通用参数
-    "common": [
+    "common": (
         "-hide_banner",         # 隐藏版权信息
         "-loglevel", "warning", # 日志级别改为warning，减少输出
-        "-stats",              # 显示统计信息
-        "-nostdin"             # 不接受标准输入
-    ]
+        "-nostdin",            # 不接受标准输入
+    ),
+    
+    # 调试模式追加（每秒输出一行统计信息）
+    "debug_extra": (
+        "-stats",
+    )
 }
 
 # MPV参数配置
@@ -176,13 +245,30 @@ MPV_PARAMS = {
         "--msg-level=all=info"          # 日志级别
     ],
     
+    # 低延迟模式下追加到接收端参数之后（覆盖前面的缓存设置）
+    "low_latency": [
+        "--profile=low-latency",
+        "--cache=no",
+        "--demuxer-max-bytes=2M",
+        "--demuxer-readahead-secs=1"
+    ],
+    
     # 重试配置
     "retry": {
-        "sender_interval": 3,            # 发送端重试间隔（秒）
+        "sender_interval": 1,            # 发送端首次重试间隔（秒），之后指数退避
+        "sender_max_interval": 15,       # 发送端重试间隔上限（秒）
         "receiver_delay": 2              # 接收端启动延迟（秒）
     }
 }
 
+# 按播放器类型预先拼好的MPV参数（类型参数 + 通用参数，启动时只需追加流地址）
+MPV_SENDER_ARGS = tuple(MPV_PARAMS["sender"] + MPV_PARAMS["common"])
+MPV_RECEIVER_ARGS = tuple(
+    MPV_PARAMS["receiver"]
+    + (MPV_PARAMS["low_latency"] if NETWORK_DEFAULTS["low_latency_mode"] else [])
+    + MPV_PARAMS["common"]
+)
+
 # Nginx配置
 NGINX_CONFIG = {
     "rtmp": {
@@ -196,18 +282,36 @@ NGINX_CONFIG = {
     }
 }
 
-# WebSocket消息类型
+# WebSocket消息类型（收发热路径直接使用常量）
+WS_TYPE_AUTH = "auth"                  # 认证
+WS_TYPE_AUTH_SUCCESS = "auth_success"  # 认证成功
+WS_TYPE_AUTH_FAILED = "auth_failed"    # 认证失败
+WS_TYPE_CHAT = "chat"                  # 聊天消息
+WS_TYPE_JOIN = "join"                  # 用户加入
+WS_TYPE_LEAVE = "leave"                # 用户离开
+WS_TYPE_MEMBERS = "members"            # 成员列表
+WS_TYPE_SRT_PORT = "srt_port"          # SRT端口分配
+WS_TYPE_ERROR = "error"                # 错误信息
+WS_TYPE_HEARTBEAT = "heartbeat"        # 心跳包
+WS_TYPE_SRT_READY = "srt_ready"        # 分发端SRT已就绪
+
+# 握手认证请求头（连接时携带验证码和昵称，服务器握手后直接认证，省去AUTH消息往返）
+WS_AUTH_CODE_HEADER = "X-Auth-Code"
+WS_NICKNAME_HEADER = "X-Nickname"      # 昵称按URL百分号编码（请求头只允许ASCII）
+
+# 兼容旧代码的映射表
 WS_MESSAGE_TYPES = {
-    "AUTH": "auth",                # 认证
-    "AUTH_SUCCESS": "auth_success", # 认证成功
-    "AUTH_FAILED": "auth_failed",   # 认证失败
-    "CHAT": "chat",                # 聊天消息
-    "JOIN": "join",                # 用户加入
-    "LEAVE": "leave",              # 用户离开
-    "MEMBERS": "members",          # 成员列表
-    "SRT_PORT": "srt_port",        # SRT端口分配
-    "ERROR": "error",              # 错误信息
-    "HEARTBEAT": "heartbeat"       # 心跳包
+    "AUTH": WS_TYPE_AUTH,
+    "AUTH_SUCCESS": WS_TYPE_AUTH_SUCCESS,
+    "AUTH_FAILED": WS_TYPE_AUTH_FAILED,
+    "CHAT": WS_TYPE_CHAT,
+    "JOIN": WS_TYPE_JOIN,
+    "LEAVE": WS_TYPE_LEAVE,
+    "MEMBERS": WS_TYPE_MEMBERS,
+    "SRT_PORT": WS_TYPE_SRT_PORT,
+    "ERROR": WS_TYPE_ERROR,
+    "HEARTBEAT": WS_TYPE_HEARTBEAT,
+    "SRT_READY": WS_TYPE_SRT_READY
 }
 
 # 日志配置
@@ -218,11 +322,16 @@ LOGGING = {
     "file_name": "online_theater.log",
     "max_bytes": 10 * 1024 * 1024,  # 10MB
     "backup_count": 5,
-    "encoding": "utf-8"
+    "encoding": "utf-8",
+    "ffmpeg_buffer_size": 64 * 1024,  # FFmpeg日志写缓冲大小
+    "ffmpeg_backup_count": 3,         # FFmpeg日志保留的历史文件数（启动程序时及超过max_bytes时轮转）
+    "ffmpeg_flush_interval": 30,      # FFmpeg日志定时刷新间隔(秒)，错误日志立即写入
+    "ffmpeg_batch_lines": 32,         # FFmpeg日志最多合并的行数
+    "ffmpeg_batch_delay": 0.1         # FFmpeg日志合并等待的最长时间(秒)
 }
 
 # Emoji列表（常用表情）
-EMOJI_LIST = [
+EMOJI_LIST = (
     "😀", "😃", "😄", "😁", "😆", "😅", "😂", "🤣", "😊", "😇",
     "🙂", "🙃", "😉", "😌", "😍", "🥰", "😘", "😗", "😙", "😚",
     "😋", "😛", "😜", "🤪", "😝", "🤑", "🤗", "🤭", "🤫", "🤔",
@@ -241,15 +350,38 @@ EMOJI_LIST = [
     "💖", "💘", "💝", "🌹", "🌺", "🌸", "🌼", "🌻", "🌷", "🥀",
     "🎉", "🎊", "🎈", "🎁", "🎀", "🏆", "🥇", "🥈", "🥉", "🏅",
     "⭐", "🌟", "✨", "💫", "🔥", "💥", "💢", "💦", "💨", "💬"
-]
+)
 
 # 错误消息
+ERR_CONNECTION_FAILED = "连接失败，请检查网络设置"
+ERR_AUTH_FAILED = "验证码错误，请重新输入"
+ERR_PORT_UNAVAILABLE = "端口被占用，请更换端口"
+ERR_STREAM_FAILED = "视频流启动失败"
+ERR_NICKNAME_DUPLICATE = "昵称已被使用，请更换"
+ERR_SERVER_ERROR = "服务器错误，请稍后重试"
+ERR_NETWORK_ERROR = "网络错误，请检查网络连接"
+
+# 兼容旧代码的映射表
 ERROR_MESSAGES = {
-    "connection_failed": "连接失败，请检查网络设置",
-    "auth_failed": "验证码错误，请重新输入",
-    "port_unavailable": "端口被占用，请更换端口",
-    "stream_failed": "视频流启动失败",
-    "nickname_duplicate": "昵称已被使用，请更换",
-    "server_error": "服务器错误，请稍后重试",
-    "network_error": "网络错误，请检查网络连接"
-}
\ No newline at end of file
+    "connection_failed": ERR_CONNECTION_FAILED,
+    "auth_failed": ERR_AUTH_FAILED,
+    "port_unavailable": ERR_PORT_UNAVAILABLE,
+    "stream_failed": ERR_STREAM_FAILED,
+    "nickname_duplicate": ERR_NICKNAME_DUPLICATE,
+    "server_error": ERR_SERVER_ERROR,
+    "network_error": ERR_NETWORK_ERROR
+}
+
+
+def _freeze(mapping):
+    """递归地将字典包装为只读映射"""
+    return MappingProxyType({
+        key: _freeze(value) if isinstance(value, dict) else value
+        for key, value in mapping.items()
+    })
+
+
+# 运行期只读的配置表，防止被意外修改
+THEME = _freeze(THEME)
+WINDOW_SIZES = _freeze(WINDOW_SIZES)
+FFMPEG_PARAMS = _freeze(FFMPEG_PARAMS)
@@ -5,10 +5,10 @@
 """
 
 import sys
-import os
 import signal
 import traceback
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
 from pathlib import Path
 from PySide6.QtWidgets import QApplication, QMessageBox
 from PySide6.QtCore import Qt, QObject, Signal, Slot, QTimer
@@ -20,14 +20,10 @@ import config
 from utils.logger import LoggerManager, get_logger
 from utils.process_manager import get_process_manager
 from ui.main_window import MainWindow
-from ui.sender_setup import SenderSetupWindow
-from ui.receiver_setup import ReceiverSetupWindow
-from ui.chat_room import ChatRoomWindow
-from network.websocket_server import WebSocketServer
-from network.websocket_client import WebSocketClient
-from streaming.nginx_manager import NginxManager
-from streaming.ffmpeg_manager import FFmpegManager
-from streaming.mpv_player import MPVPlayer
+from ui.theme import apply_global_theme
+from ui.window_utils import center_on_screen
+
+# 其余界面、网络和流媒体模块按角色在首次使用时导入，缩短启动时间
 
 # 初始化日志系统
 LoggerManager.setup()
@@ -45,6 +41,7 @@ class OnlineTheaterApp(QObject):
     member_list_updated_signal = Signal(list)       # members
     show_chat_room_signal = Signal()                # 显示聊天室
     mpv_closed_signal = Signal()                    # MPV关闭
+    srt_ready_signal = Signal()                     # 服务端SRT已就绪
     
     def __init__(self):
         super().__init__()
@@ -67,24 +64,47 @@ class OnlineTheaterApp(QObject):
         self.ffmpeg_manager = None
         self.mpv_player = None
         
-        # 配置信息
-        self.config_params = {}
+        # 配置信息（SenderConfig 或 ReceiverConfig）
+        self.config_params = None
         
         # 用于存储待处理的SRT连接信息
         self.pending_srt_info = None
+        self._mpv_start_timer = None  # 未收到就绪通知时的兜底定时器
+        
+        # 主线程标识（用于判断是否需要跨线程发射信号）
+        self._main_thread_ident = threading.get_ident()
+        
+        # 资源是否已清理（cleanup可能被多个退出路径调用）
+        self._cleaned = False
+        
+        # 全局进程管理器
+        self._process_manager = get_process_manager()
         
         # 连接内部信号
         self._connect_internal_signals()
     
     def _connect_internal_signals(self):
         """连接内部信号到槽函数"""
-        self.client_authenticated_signal.connect(self._on_client_authenticated_main_thread)
-        self.client_error_signal.connect(self._on_client_error_main_thread)
-        self.client_disconnected_signal.connect(self._on_client_disconnected_main_thread)
-        self.chat_message_received_signal.connect(self._on_chat_message_received_main_thread)
-        self.member_list_updated_signal.connect(self._on_member_list_updated_main_thread)
-        self.show_chat_room_signal.connect(self._show_chat_room_main_thread)
-        self.mpv_closed_signal.connect(self._on_mpv_closed_main_thread)
+        self._signal_bindings = (
+            (self.client_authenticated_signal, self._on_client_authenticated_main_thread),
+            (self.client_error_signal, self._on_client_error_main_thread),
+            (self.client_disconnected_signal, self._on_client_disconnected_main_thread),
+            (self.chat_message_received_signal, self._on_chat_message_received_main_thread),
+            (self.member_list_updated_signal, self._on_member_list_updated_main_thread),
+            (self.show_chat_room_signal, self._show_chat_room_main_thread),
+            (self.mpv_closed_signal, self._on_mpv_closed_main_thread),
+            (self.srt_ready_signal, self._on_srt_ready_main_thread),
+        )
+        for sig, slot in self._signal_bindings:
+            sig.connect(slot)
+    
+    def _disconnect_internal_signals(self):
+        """断开内部信号（清理时调用，避免后台线程的回调再触达已关闭的窗口）"""
+        for sig, slot in self._signal_bindings:
+            try:
+                sig.disconnect(slot)
+            except (RuntimeError, TypeError):
+                pass  # 已断开
     
     def run(self):
         """运行应用"""
@@ -94,6 +114,9 @@ class OnlineTheaterApp(QObject):
             self.app.setApplicationName(config.APP_NAME)
             self.app.setApplicationDisplayName(config.APP_NAME)
             
+            # 应用全局样式和样式表（各窗口只设置差异部分）
+            apply_global_theme(self.app)
+            
             # 设置全局异常处理
             sys.excepthook = self.handle_exception
             
@@ -111,12 +134,12 @@ class OnlineTheaterApp(QObject):
             try:
                 self.cleanup()
             except Exception as e:
-                logger.error(f"退出时清理失败: {e}")
+                logger.error("退出时清理失败: %s", e)
             
             return ret
         
         except Exception as e:
-            logger.error(f"应用运行失败: {e}")
+            logger.error("应用运行失败: %s", e)
             traceback.print_exc()
             return 1
     
@@ -125,7 +148,7 @@ class OnlineTheaterApp(QObject):
         self.main_window = MainWindow()
         self.main_window.sender_selected.connect(self.on_sender_selected)
         self.main_window.receiver_selected.connect(self.on_receiver_selected)
-        self.main_window.center_on_screen()
+        center_on_screen(self.main_window)
         self.main_window.show()
         self.current_window = self.main_window
     
@@ -143,10 +166,12 @@ class OnlineTheaterApp(QObject):
     
     def show_sender_setup(self):
         """显示发送端设置界面"""
+        from ui.sender_setup import SenderSetupWindow
+        
         self.sender_setup_window = SenderSetupWindow()
         self.sender_setup_window.setup_completed.connect(self.on_sender_setup_completed)
         self.sender_setup_window.back_requested.connect(self.back_to_main)
-        self.sender_setup_window.center_on_screen()
+        center_on_screen(self.sender_setup_window)
         
         # 切换窗口
         if self.current_window:
@@ -156,10 +181,12 @@ class OnlineTheaterApp(QObject):
     
     def show_receiver_setup(self):
         """显示接收端设置界面"""
+        from ui.receiver_setup import ReceiverSetupWindow
+        
         self.receiver_setup_window = ReceiverSetupWindow()
         self.receiver_setup_window.setup_completed.connect(self.on_receiver_setup_completed)
         self.receiver_setup_window.back_requested.connect(self.back_to_main)
-        self.receiver_setup_window.center_on_screen()
+        center_on_screen(self.receiver_setup_window)
         
         # 切换窗口
         if self.current_window:
@@ -182,8 +209,8 @@ class OnlineTheaterApp(QObject):
     @Slot(dict)
     def on_sender_setup_completed(self, params):
         """发送端设置完成"""
-        self.config_params = params
-        logger.info(f"发送端配置完成: {params}")
+        self.config_params = config.SenderConfig(**params)
+        logger.info("发送端配置完成: %s", params)
         
         # 启动发送端服务
         if self.start_sender_services():
@@ -198,8 +225,8 @@ class OnlineTheaterApp(QObject):
     @Slot(dict)
     def on_receiver_setup_completed(self, params):
         """接收端设置完成"""
-        self.config_params = params
-        logger.info(f"接收端配置完成: {params}")
+        self.config_params = config.ReceiverConfig(**params)
+        logger.info("接收端配置完成: %s", params)
         
         # 连接到服务器
         if self.connect_to_server():
@@ -214,6 +241,11 @@ class OnlineTheaterApp(QObject):
     
     def start_sender_services(self) -> bool:
         """启动发送端服务"""
+        from streaming.nginx_manager import NginxManager
+        from streaming.ffmpeg_manager import FFmpegManager
+        from streaming.mpv_player import MPVPlayer
+        from network.websocket_server import WebSocketServer
+        
         try:
             # 1. 启动Nginx RTMP服务器
             logger.info("启动Nginx RTMP服务器...")
@@ -226,8 +258,8 @@ class OnlineTheaterApp(QObject):
             logger.info("启动SRT到RTMP转换...")
             self.ffmpeg_manager = FFmpegManager()
             success = self.ffmpeg_manager.start_srt_to_rtmp(
-                srt_port=self.config_params["srt_port"],
-                bind_ip=self.config_params["bind_ip"],
+                srt_port=self.config_params.srt_port,
+                bind_ip=self.config_params.bind_ip,
                 process_name="sender_srt_input"
             )
             if not success:
@@ -238,22 +270,18 @@ class OnlineTheaterApp(QObject):
             # 3. 启动WebSocket服务器
             logger.info("启动WebSocket服务器...")
             self.ws_server = WebSocketServer(
-                verification_code=self.config_params["verification_code"]
+                verification_code=self.config_params.verification_code
             )
             
-            # 设置回调（使用lambda包装以确保线程安全）
-            self.ws_server.set_on_message_callback(
-                lambda nick, msg: self.chat_message_received_signal.emit(nick, msg)
-            )
-            self.ws_server.set_on_member_update_callback(
-                lambda members: self.member_list_updated_signal.emit(members)
-            )
+            # 设置回调（直接发射信号，由Qt排队到主线程）
+            self.ws_server.set_on_message_callback(self.chat_message_received_signal.emit)
+            self.ws_server.set_on_member_update_callback(self.member_list_updated_signal.emit)
             
             # 启动服务器
             success = self.ws_server.start_in_thread(
-                host=self.config_params["bind_ip"],
-                port=self.config_params["ws_port"],
-                sender_nickname=self.config_params["nickname"]
+                host=self.config_params.bind_ip,
+                port=self.config_params.ws_port,
+                sender_nickname=self.config_params.nickname
             )
             
             if not success:
@@ -263,51 +291,42 @@ class OnlineTheaterApp(QObject):
                 return False
             
             # 4. 如果选择本地播放，启动MPV
-            if self.config_params.get("enable_local_play", True):
+            if self.config_params.enable_local_play:
                 logger.info("[发送端] 启动本地播放器（将持续尝试连接RTMP流）...")
                 self.mpv_player = MPVPlayer(player_type="sender")
-                self.mpv_player.set_on_closed_callback(
-                    lambda: self.mpv_closed_signal.emit()
-                )
+                self.mpv_player.set_on_closed_callback(self.mpv_closed_signal.emit)
                 self.mpv_player.play_rtmp(retry=True)
             
             logger.info("[发送端] 所有服务启动成功，等待OBS推流...")
             return True
         
         except Exception as e:
-            logger.error(f"启动发送端服务失败: {e}")
+            logger.error("启动发送端服务失败: %s", e)
             traceback.print_exc()
             return False
     
     def connect_to_server(self) -> bool:
         """连接到服务器（接收端）"""
+        from network.websocket_client import WebSocketClient
+        
         try:
             logger.info("连接到服务器...")
             self.ws_client = WebSocketClient()
             
-            # 设置回调（使用lambda包装以发射信号）
-            self.ws_client.set_on_authenticated_callback(
-                lambda ip, port: self.client_authenticated_signal.emit(ip, port)
-            )
-            self.ws_client.set_on_message_callback(
-                lambda nick, msg: self.chat_message_received_signal.emit(nick, msg)
-            )
-            self.ws_client.set_on_member_update_callback(
-                lambda members: self.member_list_updated_signal.emit(members)
-            )
-            self.ws_client.set_on_error_callback(
-                lambda err: self.client_error_signal.emit(err)
-            )
-            self.ws_client.set_on_disconnected_callback(
-                lambda: self.client_disconnected_signal.emit()
-            )
+            # 设置回调（直接发射信号，由Qt排队到主线程）
+            self.ws_client.set_on_authenticated_callback(self.client_authenticated_signal.emit)
+            self.ws_client.set_on_message_callback(self.chat_message_received_signal.emit)
+            self.ws_client.set_on_member_update_callback(self.member_list_updated_signal.emit)
+            self.ws_client.set_on_error_callback(self.client_error_signal.emit)
+            self.ws_client.set_on_disconnected_callback(self.client_disconnected_signal.emit)
+            self.ws_client.set_on_srt_ready_callback(self.srt_ready_signal.emit)
             
             # 连接服务器
             success = self.ws_client.connect_in_thread(
-                host=self.config_params["server_ip"],
-                port=self.config_params["server_port"],
-                nickname=self.config_params["nickname"],
-                verification_code=self.config_params["verification_code"]
+                host=self.config_params.server_ip,
+                port=self.config_params.server_port,
+                nickname=self.config_params.nickname,
+                verification_code=self.config_params.verification_code
             )
             
             if not success:
@@ -317,41 +336,56 @@ class OnlineTheaterApp(QObject):
             return True
         
         except Exception as e:
-            logger.error(f"连接服务器失败: {e}")
+            logger.error("连接服务器失败: %s", e)
             traceback.print_exc()
             return False
     
-    def on_client_authenticated(self, server_ip: str, srt_port: int):
-        """客户端认证成功回调（在WebSocket线程中）"""
-        logger.info(f"认证成功，SRT端口: {srt_port}")
-        # 保存信息并发射信号到主线程
-        self.client_srt_info = (server_ip, srt_port)
-        self.client_authenticated_signal.emit(server_ip, srt_port)
-    
     @Slot(str, int)
     def _on_client_authenticated_main_thread(self, server_ip: str, srt_port: int):
         """客户端认证成功处理（在主线程中）"""
+        from streaming.mpv_player import MPVPlayer
+        
+        logger.info("认证成功，SRT端口: %s", srt_port)
+        
         # 启动MPV播放器
         self.mpv_player = MPVPlayer(player_type="receiver")
         
         # 设置MPV关闭回调（使用信号）
-        self.mpv_player.set_on_closed_callback(
-            lambda: self.mpv_closed_signal.emit()
-        )
+        self.mpv_player.set_on_closed_callback(self.mpv_closed_signal.emit)
         
-        success = QTimer.singleShot(5000, lambda: self.mpv_player.play_srt(server_ip, srt_port))
+        # 收到服务端就绪通知后立即播放，最多等待5秒
+        self.pending_srt_info = (server_ip, srt_port)
+        if self._mpv_start_timer is None:
+            self._mpv_start_timer = QTimer(self)
+            self._mpv_start_timer.setSingleShot(True)
+            self._mpv_start_timer.timeout.connect(self._start_pending_playback)
+        self._mpv_start_timer.start(5000)
         
         # 显示聊天室
         self.show_chat_room()
     
-    def on_client_error(self, error_msg: str):
-        """客户端错误回调（在WebSocket线程中）"""
-        logger.error(f"客户端错误: {error_msg}")
-        self.client_error_signal.emit(error_msg)
+    @Slot()
+    def _on_srt_ready_main_thread(self):
+        """服务端SRT就绪处理（在主线程中）"""
+        self._start_pending_playback()
+    
+    @Slot()
+    def _start_pending_playback(self):
+        """启动待播放的SRT流（就绪通知与兜底定时器只会生效一次）"""
+        if self.pending_srt_info is None or not self.mpv_player:
+            return
+        
+        server_ip, srt_port = self.pending_srt_info
+        self.pending_srt_info = None
+        if self._mpv_start_timer:
+            self._mpv_start_timer.stop()
+        
+        self.mpv_player.play_srt(server_ip, srt_port)
     
     @Slot(str)
     def _on_client_error_main_thread(self, error_msg: str):
         """客户端错误处理（在主线程中）"""
+        logger.error("客户端错误: %s", error_msg)
         if self.current_window:
             QMessageBox.warning(
                 self.current_window,
@@ -359,14 +393,10 @@ class OnlineTheaterApp(QObject):
                 error_msg
             )
     
-    def on_client_disconnected(self):
-        """客户端断开连接回调（在WebSocket线程中）"""
-        logger.warning("与服务器断开连接")
-        self.client_disconnected_signal.emit()
-    
     @Slot()
     def _on_client_disconnected_main_thread(self):
         """客户端断开连接处理（在主线程中）"""
+        logger.warning("与服务器断开连接")
         # 可以在这里处理重连逻辑或显示提示
         if self.chat_room_window:
             self.chat_room_window.add_message("系统", "与服务器的连接已断开", True)
@@ -374,7 +404,7 @@ class OnlineTheaterApp(QObject):
     def show_chat_room(self):
         """显示聊天室界面（确保在主线程中）"""
         # 如果不在主线程，发射信号
-        if threading.current_thread() != threading.main_thread():
+        if threading.get_ident() != self._main_thread_ident:
             self.show_chat_room_signal.emit()
             return
         
@@ -383,9 +413,11 @@ class OnlineTheaterApp(QObject):
     @Slot()
     def _show_chat_room_main_thread(self):
         """显示聊天室界面（在主线程中执行）"""
+        from ui.chat_room import ChatRoomWindow
+        
         self.chat_room_window = ChatRoomWindow(
             role=self.role,
-            nickname=self.config_params["nickname"]
+            nickname=self.config_params.nickname
         )
         
         # 连接信号
@@ -394,11 +426,9 @@ class OnlineTheaterApp(QObject):
         
         # 设置MPV关闭回调（使用信号）
         if self.mpv_player:
-            self.mpv_player.set_on_closed_callback(
-                lambda: self.mpv_closed_signal.emit()
-            )
+            self.mpv_player.set_on_closed_callback(self.mpv_closed_signal.emit)
         
-        self.chat_room_window.center_on_screen()
+        center_on_screen(self.chat_room_window)
         
         # 切换窗口
         if self.current_window:
@@ -444,53 +474,57 @@ class OnlineTheaterApp(QObject):
         try:
             self.cleanup()
         except Exception as e:
-            logger.error(f"关闭时清理失败: {e}")
+            logger.error("关闭时清理失败: %s", e)
         finally:
             self.app.quit()
     
     def cleanup(self):
         """清理资源"""
+        # 聊天室关闭、系统信号和事件循环退出都会调用，只执行一次
+        if self._cleaned:
+            return
+        self._cleaned = True
+        
         logger.info("清理资源...")
         
         # 清除待处理的连接信息
         self.pending_srt_info = None
         
+        self._disconnect_internal_signals()
+        
         try:
-            # 停止MPV
-            if self.mpv_player:
-                self.mpv_player.cleanup()
-            
-            # 停止WebSocket（先客户端后服务器）
-            if self.ws_client:
-                try:
-                    self.ws_client.cleanup()
-                except Exception as e:
-                    logger.debug(f"清理WebSocket客户端时出错: {e}")
-            
-            if self.ws_server:
+            # 各组件互不依赖，并行停止（MPV、WebSocket、FFmpeg、Nginx）
+            components = (
+                ("MPV", self.mpv_player),
+                ("WebSocket客户端", self.ws_client),
+                ("WebSocket服务器", self.ws_server),
+                ("FFmpeg", self.ffmpeg_manager),
+                ("Nginx", self.nginx_manager),
+            )
+            tasks = [(name, comp.cleanup) for name, comp in components if comp]
+            if tasks:
+                executor = ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="cleanup")
+                futures = {executor.submit(func): name for name, func in tasks}
                 try:
-                    self.ws_server.cleanup()
-                except Exception as e:
-                    logger.debug(f"清理WebSocket服务器时出错: {e}")
-            
-            # 停止FFmpeg
-            if self.ffmpeg_manager:
-                self.ffmpeg_manager.cleanup()
-            
-            # 停止Nginx
-            if self.nginx_manager:
-                self.nginx_manager.cleanup()
+                    for future in as_completed(futures, timeout=5):
+                        exc = future.exception()
+                        if exc:
+                            logger.error("清理%s时出错: %s", futures[future], exc)
+                except FutureTimeoutError:
+                    pending = [name for future, name in futures.items() if not future.done()]
+                    logger.warning("清理超时: %s", ", ".join(pending))
+                finally:
+                    executor.shutdown(wait=False)
             
             # 停止所有进程
-            process_manager = get_process_manager()
-            process_manager.cleanup()
+            self._process_manager.cleanup()
             
             # 清理日志
             LoggerManager.cleanup()
             
             logger.info("资源清理完成")
         except Exception as e:
-            logger.error(f"清理资源时出错: {e}")
+            logger.error("清理资源时出错: %s", e)
     
     def handle_exception(self, exc_type, exc_value, exc_traceback):
         """全局异常处理"""
@@ -506,11 +540,11 @@ class OnlineTheaterApp(QObject):
     
     def handle_signal(self, signum, frame):
         """处理系统信号"""
-        logger.info(f"收到信号: {signum}")
+        logger.info("收到信号: %s", signum)
         try:
             self.cleanup()
         except Exception as e:
-            logger.error(f"信号处理时清理失败: {e}")
+            logger.error("信号处理时清理失败: %s", e)
         finally:
             sys.exit(0)
 
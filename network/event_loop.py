@@ -0,0 +1,23 @@
+# network/event_loop.py - 事件循环创建
+"""
+为WebSocket线程创建事件循环
+非Windows平台安装了uvloop时使用uvloop，否则使用asyncio默认循环
+"""
+
+import asyncio
+import platform
+
+try:
+    # uvloop不支持Windows
+    if platform.system() == 'Windows':
+        raise ImportError
+    import uvloop
+except ImportError:  # 可选依赖
+    uvloop = None
+
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """创建新的事件循环（优先uvloop）"""
+    if uvloop is not None:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
@@ -1,28 +1,79 @@
 # network/websocket_client.py - WebSocket客户端
 import asyncio
+import concurrent.futures
 import websockets
-import json
+import random
+from collections import deque
 import threading
 import time
-from typing import Optional, Callable, Dict, Any
-from datetime import datetime
+from urllib.parse import quote
+from typing import Optional, Callable, Dict, Any, Tuple
 import config
 from utils.logger import get_logger
+from utils import json_codec
 from utils.network_utils import NetworkUtils
+from network.event_loop import new_event_loop
 
 logger = get_logger(__name__)
 
+# Python 3.11+ 使用TaskGroup管理连接会话中的并发任务
+_HAS_TASKGROUP = hasattr(asyncio, "TaskGroup")
+
+# 服务器心跳响应的原始帧（标准库json与orjson两种编码，文本与二进制帧），命中时跳过JSON解析
+_HEARTBEAT_FRAMES = frozenset(
+    frame
+    for text in (
+        '{"type": "%s"}' % config.WS_TYPE_HEARTBEAT,
+        '{"type":"%s"}' % config.WS_TYPE_HEARTBEAT,
+    )
+    for frame in (text, text.encode())
+)
+
 class WebSocketClient:
     """WebSocket客户端（接收端使用）"""
     
+    # 所有客户端实例共享一个事件循环线程
+    _shared_loop: Optional[asyncio.AbstractEventLoop] = None
+    _shared_thread: Optional[threading.Thread] = None
+    _shared_lock = threading.Lock()
+    
+    __slots__ = (
+        "websocket", "loop", "client_thread", "_connect_future",
+        "running", "connected", "authenticated", "_auth_event", "_last_send_ts",
+        "_heartbeat_frame", "_auth_headers", "_auth_headers_key",
+        "_outbox", "_outbox_waker", "_connect_task", "_close_lock", "_closed",
+        "server_host", "server_port", "nickname", "verification_code", "srt_port", "server_ip",
+        "on_connected_callback", "on_disconnected_callback", "on_authenticated_callback",
+        "on_message_callback", "on_member_update_callback", "on_error_callback", "on_srt_ready_callback",
+        "auto_reconnect", "reconnect_interval", "max_reconnect_interval", "max_reconnect_attempts",
+        "reconnect_attempts", "_stop_event", "_dispatch",
+    )
+    
     def __init__(self):
         """初始化WebSocket客户端"""
         self.websocket = None
         self.loop = None
         self.client_thread = None
+        self._connect_future: Optional[concurrent.futures.Future] = None
         self.running = False
         self.connected = False
         self.authenticated = False
+        self._auth_event = threading.Event()  # 收到认证结果（成功或失败）时置位
+        self._last_send_ts = 0.0  # 最近一次成功发送消息的时间（time.monotonic）
+        
+        # 预编码的固定消息帧
+        self._heartbeat_frame = json_codec.dumps_bytes({"type": config.WS_TYPE_HEARTBEAT})
+        self._auth_headers: Optional[Dict[str, str]] = None
+        self._auth_headers_key = None  # (验证码, 昵称)，变化时重新生成
+        
+        # 发送队列：单一写任务按顺序发送，Future仅用于唤醒（写任务随连接会话启动）
+        self._outbox = deque()
+        self._outbox_waker: Optional[asyncio.Future] = None
+        self._connect_task: Optional[asyncio.Task] = None  # 运行connect()的任务（含重连）
+        
+        # 关闭控制：锁在事件循环内创建，_closed在每次连接成功后复位
+        self._close_lock: Optional[asyncio.Lock] = None
+        self._closed = True
         
         # 连接信息
         self.server_host = None
@@ -39,64 +90,102 @@ class WebSocketClient:
         self.on_message_callback: Optional[Callable] = None
         self.on_member_update_callback: Optional[Callable] = None
         self.on_error_callback: Optional[Callable] = None
+        self.on_srt_ready_callback: Optional[Callable] = None
         
         # 重连控制
         self.auto_reconnect = True
         self.reconnect_interval = config.NETWORK_DEFAULTS["reconnect_interval"]
+        self.max_reconnect_interval = config.NETWORK_DEFAULTS["max_reconnect_interval"]
         self.max_reconnect_attempts = config.NETWORK_DEFAULTS["max_reconnect_attempts"]
         self.reconnect_attempts = 0
+        self._stop_event: Optional[asyncio.Event] = None  # 在事件循环内创建，主动断开时置位
+        
+        # 消息类型 -> 处理方法
+        self._dispatch: Dict[str, Callable] = {
+            config.WS_TYPE_AUTH_SUCCESS: self._on_auth_success,
+            config.WS_TYPE_AUTH_FAILED: self._on_auth_failed,
+            config.WS_TYPE_CHAT: self._on_chat,
+            config.WS_TYPE_JOIN: self._on_system_message,
+            config.WS_TYPE_LEAVE: self._on_system_message,
+            config.WS_TYPE_MEMBERS: self._on_members,
+            config.WS_TYPE_ERROR: self._on_error,
+            config.WS_TYPE_SRT_READY: self._on_srt_ready,
+            config.WS_TYPE_HEARTBEAT: self._on_heartbeat,
+        }
     
     async def connect(self, host: str, port: int, nickname: str, verification_code: str) -> bool:
         """
-        连接到WebSocket服务器
+        连接到WebSocket服务器（连接断开后按设置在此循环重连，直到停止）
         Args:
             host: 服务器地址
             port: 服务器端口
             nickname: 昵称
             verification_code: 验证码
+        返回: 首次连接是否成功
         """
-        try:
-            self.server_host = host
-            self.server_port = port
-            self.nickname = nickname
-            self.verification_code = verification_code
-            
-            # 处理IPv6地址格式
-            if NetworkUtils.is_valid_ipv6(host):
-                # WebSocket URI中IPv6地址需要用方括号
-                host_formatted = NetworkUtils.format_ipv6_for_url(host)
-            else:
-                host_formatted = host
+        self._connect_task = asyncio.current_task()
+        self.server_host = host
+        self.server_port = port
+        self.nickname = nickname
+        self.verification_code = verification_code
+        
+        # 处理IPv6地址格式
+        if NetworkUtils.is_valid_ipv6(host):
+            # WebSocket URI中IPv6地址需要用方括号
+            host_formatted = NetworkUtils.format_ipv6_for_url(host)
+        else:
+            host_formatted = host
+        
+        # 构建WebSocket URI
+        uri = f"ws://{host_formatted}:{port}"
+        
+        first_result = None
+        while True:
+            connected, retry = await self._connect_once(uri)
+            if first_result is None:
+                first_result = connected
             
-            # 构建WebSocket URI
-            uri = f"ws://{host_formatted}:{port}"
-            logger.info(f"正在连接到: {uri}")
+            # 连接异常断开或连接失败时，等待后在循环中重连（不递归调用，避免等待链随重连次数增长）
+            if not (retry and self.auto_reconnect and await self._wait_before_reconnect()):
+                return first_result
+    
+    async def _connect_once(self, uri: str) -> Tuple[bool, bool]:
+        """
+        连接一次并运行会话直到连接结束
+        返回: (是否连接成功, 是否需要重连)
+        """
+        self._auth_event.clear()
+        try:
+            logger.info("正在连接到: %s", uri)
             
-            # 连接服务器
+            # 连接服务器（认证信息随握手请求头发送）
             self.websocket = await websockets.connect(
                 uri,
+                extra_headers=self._get_auth_headers(),
                 ping_interval=20,
                 ping_timeout=10,
-                close_timeout=10  # 添加关闭超时
+                close_timeout=10,  # 添加关闭超时
+                compression=config.NETWORK_DEFAULTS["websocket_compression"],
+                # 缓冲按聊天消息规模设置（默认1MiB/32条远超需要）
+                max_size=config.NETWORK_DEFAULTS["websocket_max_size"],
+                max_queue=8,
+                read_limit=65536,
+                write_limit=65536
             )
             
             self.connected = True
             self.running = True
+            self._closed = False
             self.reconnect_attempts = 0
             
-            logger.info(f"已连接到服务器: {host}:{port}")
+            logger.info("已连接到服务器: %s:%s", self.server_host, self.server_port)
             
             # 触发连接回调
-            if self.on_connected_callback:
-                self.on_connected_callback()
-            
-            # 发送认证请求
-            await self._authenticate()
-            
-            # 开始接收消息
-            await self._receive_messages()
+            self._fire(self.on_connected_callback)
             
-            return True
+            # 并发运行接收、心跳和发送任务，直到连接结束；连接异常断开时需要重连
+            connection_lost = await self._run_session()
+            return True, connection_lost
         
         except asyncio.CancelledError:
             # 任务被取消
@@ -105,116 +194,163 @@ class WebSocketClient:
             raise
         
         except Exception as e:
-            logger.error(f"连接服务器失败: {e}")
+            logger.error("连接服务器失败: %s", e)
             self.connected = False
             
             # 触发错误回调
-            if self.on_error_callback:
-                self.on_error_callback(f"连接失败: {str(e)}")
+            self._fire(self.on_error_callback, f"连接失败: {str(e)}")
             
-            # 自动重连
-            if self.auto_reconnect and self.reconnect_attempts < self.max_reconnect_attempts and self.running:
-                await self._try_reconnect()
-            
-            return False
+            # 重连过程中连接失败时继续重连
+            return False, self.reconnect_attempts < self.max_reconnect_attempts and self.running
+    
+    @classmethod
+    def _ensure_loop(cls) -> asyncio.AbstractEventLoop:
+        """获取共享事件循环，首次使用时启动循环线程"""
+        with cls._shared_lock:
+            if cls._shared_loop is None or not cls._shared_thread.is_alive():
+                loop = new_event_loop()
+                thread = threading.Thread(
+                    target=cls._run_shared_loop,
+                    args=(loop,),
+                    name="WebSocketClientLoop",
+                    daemon=True
+                )
+                thread.start()
+                cls._shared_loop = loop
+                cls._shared_thread = thread
+            return cls._shared_loop
+    
+    @staticmethod
+    def _run_shared_loop(loop: asyncio.AbstractEventLoop):
+        """共享事件循环线程入口"""
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        except Exception as e:
+            logger.error("客户端事件循环异常: %s", e)
+        finally:
+            loop.close()
     
     def connect_in_thread(self, host: str, port: int, nickname: str, verification_code: str) -> bool:
-        """在独立线程中连接服务器"""
+        """在共享事件循环线程中连接服务器"""
         try:
-            def run_client():
-                try:
-                    self.loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(self.loop)
-                    
-                    # 连接服务器
-                    self.loop.run_until_complete(
-                        self.connect(host, port, nickname, verification_code)
-                    )
-                except RuntimeError as e:
-                    # 事件循环被停止时的正常情况
-                    if "Event loop stopped" in str(e):
-                        logger.debug("事件循环已停止")
-                    else:
-                        logger.error(f"运行客户端时出错: {e}")
-                except Exception as e:
-                    logger.error(f"客户端线程异常: {e}")
-                finally:
-                    # 确保循环关闭
-                    if self.loop and not self.loop.is_closed():
-                        self.loop.close()
+            self.loop = self._ensure_loop()
+            self.client_thread = self._shared_thread
             
-            self.client_thread = threading.Thread(target=run_client, daemon=True)
-            self.client_thread.start()
+            self._auth_event.clear()
+            self._connect_future = asyncio.run_coroutine_threadsafe(
+                self.connect(host, port, nickname, verification_code),
+                self.loop
+            )
+            self._connect_future.add_done_callback(self._on_connect_done)
             
-            # 等待连接和认证
-            import time
-            for _ in range(30):  # 最多等待3秒
-                if self.authenticated:
-                    return True
-                time.sleep(0.1)
+            # 等待认证结果，最多3秒
+            if self._auth_event.wait(timeout=3.0) and self.authenticated:
+                return True
             
             return self.connected
         
         except Exception as e:
-            logger.error(f"在线程中连接服务器失败: {e}")
+            logger.error("在线程中连接服务器失败: %s", e)
             return False
     
-    async def _authenticate(self):
-        """发送认证请求"""
-        if not self.running:
-            return
-            
-        auth_data = {
-            "type": config.WS_MESSAGE_TYPES["AUTH"],
-            "code": self.verification_code,
-            "nickname": self.nickname
-        }
-        
-        await self._send_message(auth_data)
-        logger.info("已发送认证请求")
+    def _fire(self, callback: Optional[Callable], *args):
+        """
+        触发回调：通过call_soon在下一轮事件循环中执行，
+        不在接收循环内同步调用，回调异常也不会中断接收
+        """
+        if callback:
+            asyncio.get_event_loop().call_soon(callback, *args)
+    
+    def _on_connect_done(self, future: concurrent.futures.Future):
+        """连接任务结束：唤醒等待者，避免空等超时"""
+        self._auth_event.set()
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("客户端连接任务异常: %s", future.exception())
+    
+    def _get_auth_headers(self) -> Dict[str, str]:
+        """获取握手认证请求头"""
+        # 重连时验证码和昵称不变，复用已生成的请求头
+        key = (self.verification_code, self.nickname)
+        if self._auth_headers_key != key:
+            self._auth_headers = {
+                config.WS_AUTH_CODE_HEADER: self.verification_code,
+                config.WS_NICKNAME_HEADER: quote(self.nickname, safe="")
+            }
+            self._auth_headers_key = key
+        return self._auth_headers
+    
+    async def _run_session(self) -> bool:
+        """
+        并发运行接收循环、心跳任务和发送任务
+        接收循环结束时取消其余任务；返回连接是否异常断开
+        """
+        if _HAS_TASKGROUP:
+            async with asyncio.TaskGroup() as tg:
+                background = (
+                    tg.create_task(self._send_heartbeat()),
+                    tg.create_task(self._outbox_writer()),
+                )
+                try:
+                    return await self._receive_messages()
+                finally:
+                    for task in background:
+                        task.cancel()
+        
+        # Python 3.11以下没有TaskGroup：手动创建并在结束时取消
+        background = (
+            asyncio.ensure_future(self._send_heartbeat()),
+            asyncio.ensure_future(self._outbox_writer()),
+        )
+        try:
+            return await self._receive_messages()
+        finally:
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
     
-    async def _receive_messages(self):
-        """接收服务器消息"""
+    async def _receive_messages(self) -> bool:
+        """接收服务器消息，返回连接是否异常断开（需要重连）"""
         try:
             async for message in self.websocket:
                 # 检查是否应该停止
                 if not self.running:
                     break
+                
+                # 心跳响应快速路径
+                if message in _HEARTBEAT_FRAMES:
+                    logger.debug("收到心跳响应")
+                    continue
                     
                 try:
-                    data = json.loads(message)
+                    # 服务器以二进制帧发送UTF-8 JSON，bytes直接交给解析器，无需先解码为str
+                    data = json_codec.loads(message)
                     await self._handle_message(data)
                 
-                except json.JSONDecodeError:
-                    logger.error(f"无效的JSON消息: {message}")
+                except json_codec.JSONDecodeError:
+                    logger.error("无效的JSON消息: %s", message)
                 except Exception as e:
-                    logger.error(f"处理消息时出错: {e}")
+                    logger.error("处理消息时出错: %s", e)
         
         except websockets.exceptions.ConnectionClosed:
             if self.running:  # 只在仍在运行时记录警告
                 logger.warning("服务器连接已断开")
-                self.connected = False
+                await self._do_close()
                 
                 # 触发断开连接回调
-                if self.on_disconnected_callback:
-                    self.on_disconnected_callback()
+                self._fire(self.on_disconnected_callback)
                 
-                # 尝试重连
-                if self.auto_reconnect:
-                    await self._try_reconnect()
+                return True
         
         except websockets.exceptions.ConnectionClosedError as e:
             if self.running:  # 只在仍在运行时记录警告
-                logger.warning(f"服务器连接关闭: {e}")
-                self.connected = False
+                logger.warning("服务器连接关闭: %s", e)
+                await self._do_close()
                 
                 # 触发断开连接回调
-                if self.on_disconnected_callback:
-                    self.on_disconnected_callback()
+                self._fire(self.on_disconnected_callback)
                 
-                # 尝试重连
-                if self.auto_reconnect:
-                    await self._try_reconnect()
+                return True
         
         except asyncio.CancelledError:
             # 任务被取消，正常退出
@@ -223,8 +359,10 @@ class WebSocketClient:
         
         except Exception as e:
             if self.running:  # 只在仍在运行时记录错误
-                logger.error(f"接收消息时出错: {e}")
-            self.connected = False
+                logger.error("接收消息时出错: %s", e)
+            await self._do_close()
+        
+        return False
     
     async def _handle_message(self, data: Dict[str, Any]):
         """处理接收到的消息"""
@@ -232,83 +370,67 @@ class WebSocketClient:
             return
             
         msg_type = data.get("type")
+        handler = self._dispatch.get(msg_type)
         
-        if msg_type == config.WS_MESSAGE_TYPES["AUTH_SUCCESS"]:
-            # 认证成功
-            self.authenticated = True
-            self.nickname = data.get("nickname", self.nickname)  # 可能被服务器修改
-            self.srt_port = data.get("srt_port")
-            self.server_ip = data.get("server_ip")
-            
-            logger.info(f"认证成功: {self.nickname}")
-            logger.info(f"SRT端口: {self.srt_port}")
-            
-            # 触发认证成功回调
-            if self.on_authenticated_callback:
-                self.on_authenticated_callback(self.server_ip, self.srt_port)
-        
-        elif msg_type == config.WS_MESSAGE_TYPES["AUTH_FAILED"]:
-            # 认证失败
-            error_msg = data.get("message", "认证失败")
-            logger.error(f"认证失败: {error_msg}")
-            
-            # 触发错误回调
-            if self.on_error_callback:
-                self.on_error_callback(error_msg)
-            
-            # 断开连接
-            await self.disconnect()
-        
-        elif msg_type == config.WS_MESSAGE_TYPES["CHAT"]:
-            # 聊天消息
-            nickname = data.get("nickname")
-            message = data.get("message")
-            
-            # 触发消息回调
-            if self.on_message_callback:
-                self.on_message_callback(nickname, message)
-        
-        elif msg_type == config.WS_MESSAGE_TYPES["JOIN"]:
-            # 用户加入
-            nickname = data.get("nickname")
-            message = data.get("message")
-            
-            # 作为系统消息处理
-            if self.on_message_callback:
-                self.on_message_callback("系统", message)
-        
-        elif msg_type == config.WS_MESSAGE_TYPES["LEAVE"]:
-            # 用户离开
-            nickname = data.get("nickname")
-            message = data.get("message")
-            
-            # 作为系统消息处理
-            if self.on_message_callback:
-                self.on_message_callback("系统", message)
+        if handler:
+            await handler(data)
+        else:
+            logger.warning("未知消息类型: %s", msg_type)
+    
+    async def _on_auth_success(self, data: Dict[str, Any]):
+        """认证成功"""
+        self.authenticated = True
+        self.nickname = data.get("nickname", self.nickname)  # 可能被服务器修改
+        self.srt_port = data.get("srt_port")
+        self.server_ip = data.get("server_ip")
+        
+        logger.info("认证成功: %s", self.nickname)
+        logger.info("SRT端口: %s", self.srt_port)
+        self._auth_event.set()
+        
+        # 触发认证成功回调
+        self._fire(self.on_authenticated_callback, self.server_ip, self.srt_port)
+    
+    async def _on_auth_failed(self, data: Dict[str, Any]):
+        """认证失败"""
+        error_msg = data.get("message", "认证失败")
+        logger.error("认证失败: %s", error_msg)
+        self._auth_event.set()
         
-        elif msg_type == config.WS_MESSAGE_TYPES["MEMBERS"]:
-            # 成员列表更新
-            members = data.get("members", [])
-            
-            # 触发成员更新回调
-            if self.on_member_update_callback:
-                self.on_member_update_callback(members)
-        
-        elif msg_type == config.WS_MESSAGE_TYPES["ERROR"]:
-            # 错误消息
-            error_msg = data.get("message", "未知错误")
-            logger.error(f"服务器错误: {error_msg}")
-            
-            # 触发错误回调
-            if self.on_error_callback:
-                self.on_error_callback(error_msg)
+        # 触发错误回调
+        self._fire(self.on_error_callback, error_msg)
         
-        elif msg_type == config.WS_MESSAGE_TYPES["HEARTBEAT"]:
-            # 心跳响应
-            logger.debug("收到心跳响应")
+        # 断开连接
+        await self.disconnect()
+    
+    async def _on_chat(self, data: Dict[str, Any]):
+        """聊天消息"""
+        self._fire(self.on_message_callback, data.get("nickname"), data.get("message"))
+    
+    async def _on_system_message(self, data: Dict[str, Any]):
+        """用户加入/离开，作为系统消息处理"""
+        self._fire(self.on_message_callback, "系统", data.get("message"))
+    
+    async def _on_members(self, data: Dict[str, Any]):
+        """成员列表更新"""
+        self._fire(self.on_member_update_callback, data.get("members", []))
+    
+    async def _on_error(self, data: Dict[str, Any]):
+        """服务器错误消息"""
+        error_msg = data.get("message", "未知错误")
+        logger.error("服务器错误: %s", error_msg)
         
-        else:
-            logger.warning(f"未知消息类型: {msg_type}")
+        # 触发错误回调
+        self._fire(self.on_error_callback, error_msg)
+    
+    async def _on_srt_ready(self, data: Dict[str, Any]):
+        """服务端SRT分发已就绪，可以开始播放"""
+        logger.debug("SRT流已就绪")
+        self._fire(self.on_srt_ready_callback)
+    
+    async def _on_heartbeat(self, data: Dict[str, Any]):
+        """心跳响应"""
+        logger.debug("收到心跳响应")
     
     async def send_chat_message(self, message: str):
         """发送聊天消息"""
@@ -316,47 +438,82 @@ class WebSocketClient:
             logger.debug("未认证或正在关闭，无法发送消息")
             return
         
-        chat_data = {
-            "type": config.WS_MESSAGE_TYPES["CHAT"],
+        self._enqueue_frame(json_codec.dumps_bytes({
+            "type": config.WS_TYPE_CHAT,
             "message": message
-        }
-        
-        await self._send_message(chat_data)
+        }))
     
     def send_chat_message_sync(self, message: str):
         """同步发送聊天消息（供UI线程调用）"""
         if self.loop and self.authenticated and not self.loop.is_closed():
             try:
-                asyncio.run_coroutine_threadsafe(
-                    self.send_chat_message(message),
-                    self.loop
-                )
+                # 在UI线程完成编码，只把入队操作交给事件循环
+                frame = json_codec.dumps_bytes({
+                    "type": config.WS_TYPE_CHAT,
+                    "message": message
+                })
+                self.loop.call_soon_threadsafe(self._enqueue_frame, frame)
             except Exception as e:
-                logger.debug(f"发送聊天消息时出错: {e}")
+                logger.debug("发送聊天消息时出错: %s", e)
+    
+    def _enqueue_frame(self, frame: bytes):
+        """将已编码的消息帧放入发送队列（须在事件循环线程中调用）"""
+        self._outbox.append(frame)
+        waker = self._outbox_waker
+        if waker is not None and not waker.done():
+            waker.set_result(None)
+    
+    async def _outbox_writer(self):
+        """发送任务：队列为空时等待唤醒，否则依次发送"""
+        loop = asyncio.get_event_loop()
+        outbox = self._outbox
+        try:
+            while self.running:
+                if not outbox:
+                    self._outbox_waker = loop.create_future()
+                    await self._outbox_waker
+                    self._outbox_waker = None
+                    continue
+                
+                while outbox:
+                    await self._send_frame(outbox.popleft())
+        
+        except asyncio.CancelledError:
+            logger.debug("发送任务被取消")
+        finally:
+            self._outbox_waker = None
     
     async def _send_message(self, data: Dict[str, Any]):
         """发送消息到服务器"""
+        await self._send_frame(json_codec.dumps_bytes(data))
+    
+    async def _send_frame(self, message: bytes):
+        """发送已编码的消息帧到服务器（bytes以二进制帧发送）"""
         if not self.websocket or not self.connected or not self.running:
             logger.debug("未连接到服务器或正在关闭，跳过发送消息")
             return
         
         try:
-            message = json.dumps(data, ensure_ascii=False)
             await self.websocket.send(message)
+            self._last_send_ts = time.monotonic()
         except Exception as e:
             if self.running:  # 只在运行中时记录错误
-                logger.error(f"发送消息失败: {e}")
+                logger.error("发送消息失败: %s", e)
     
     async def _send_heartbeat(self):
-        """发送心跳包"""
+        """发送心跳包（仅在一段时间内没有发送过任何消息时才发送）"""
+        interval = config.NETWORK_DEFAULTS["heartbeat_interval"]
+        check_interval = config.NETWORK_DEFAULTS["heartbeat_check_interval"]
         while self.running and self.connected:
             try:
-                await asyncio.sleep(30)  # 每30秒发送一次心跳
+                await asyncio.sleep(check_interval)
+                
+                # 有其他消息发出时即视为保活，跳过心跳
+                if time.monotonic() - self._last_send_ts < interval:
+                    continue
                 
                 if self.authenticated and self.running:
-                    await self._send_message({
-                        "type": config.WS_MESSAGE_TYPES["HEARTBEAT"]
-                    })
+                    self._enqueue_frame(self._heartbeat_frame)
                     logger.debug("发送心跳包")
             
             except asyncio.CancelledError:
@@ -364,59 +521,74 @@ class WebSocketClient:
                 logger.debug("心跳任务被取消")
                 break
             except Exception as e:
-                logger.error(f"发送心跳包失败: {e}")
+                logger.error("发送心跳包失败: %s", e)
                 break
     
-    async def _try_reconnect(self):
-        """尝试重新连接"""
+    async def _wait_before_reconnect(self) -> bool:
+        """重连前等待（指数退避），返回是否应继续重连"""
         if not self.auto_reconnect or not self.running:
-            return
+            return False
         
         self.reconnect_attempts += 1
         
         if self.reconnect_attempts > self.max_reconnect_attempts:
-            logger.error(f"达到最大重连次数({self.max_reconnect_attempts})，停止重连")
+            logger.error("达到最大重连次数(%s)，停止重连", self.max_reconnect_attempts)
             
             # 触发错误回调
-            if self.on_error_callback:
-                self.on_error_callback("无法连接到服务器")
-            return
+            self._fire(self.on_error_callback, "无法连接到服务器")
+            return False
         
-        logger.info(f"将在{self.reconnect_interval}秒后尝试重连... (第{self.reconnect_attempts}次)")
+        # 指数退避 + 随机抖动，避免大量客户端同时重连
+        delay = min(
+            self.reconnect_interval * (2 ** (self.reconnect_attempts - 1)),
+            self.max_reconnect_interval
+        ) * random.uniform(0.5, 1.5)
+        logger.info("将在%.1f秒后尝试重连... (第%s次)", delay, self.reconnect_attempts)
         
-        # 等待期间检查运行状态
-        for _ in range(int(self.reconnect_interval * 10)):
-            if not self.running:
-                logger.debug("重连被取消")
-                return
-            await asyncio.sleep(0.1)
-        
-        if self.running:
-            await self.connect(
-                self.server_host,
-                self.server_port,
-                self.nickname,
-                self.verification_code
-            )
+        # 等待期间可被主动断开立即唤醒
+        if self._stop_event is None:
+            self._stop_event = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
+            logger.debug("重连被取消")
+            return False
+        except asyncio.TimeoutError:
+            pass
+        
+        return self.running
     
     async def disconnect(self):
         """断开连接"""
         self.running = False
         self.auto_reconnect = False  # 主动断开时不自动重连
+        if self._stop_event is not None:
+            self._stop_event.set()
         
-        if self.websocket:
-            try:
-                await self.websocket.close()
-            except Exception as e:
-                logger.debug(f"关闭websocket时出错: {e}")
-            finally:
-                self.websocket = None
-        
-        self.connected = False
-        self.authenticated = False
+        await self._do_close()
         
         logger.debug("已断开与服务器的连接")
     
+    async def _do_close(self):
+        """关闭当前连接（幂等，所有断开路径共用）"""
+        if self._close_lock is None:
+            self._close_lock = asyncio.Lock()
+        
+        async with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            
+            websocket = self.websocket
+            self.websocket = None
+            self.connected = False
+            self.authenticated = False
+            
+            if websocket is not None:
+                try:
+                    await websocket.close()
+                except Exception as e:
+                    logger.debug("关闭websocket时出错: %s", e)
+    
     def disconnect_sync(self):
         """同步断开连接（供UI线程调用）"""
         if self.loop and self.connected and not self.loop.is_closed():
@@ -428,61 +600,36 @@ class WebSocketClient:
                 # 等待断开完成，最多1秒
                 future.result(timeout=1.0)
             except Exception as e:
-                logger.debug(f"同步断开连接时出错: {e}")
+                logger.debug("同步断开连接时出错: %s", e)
     
     def stop(self):
-        """停止客户端"""
+        """停止客户端（共享事件循环继续运行）"""
         self.running = False
         self.auto_reconnect = False
         
-        # 先断开连接
-        if self.websocket and self.connected:
-            if self.loop and not self.loop.is_closed():
-                # 创建断开连接的任务
-                future = asyncio.run_coroutine_threadsafe(
-                    self._disconnect_async(),
-                    self.loop
-                )
-                try:
-                    # 等待断开完成，最多1秒
-                    future.result(timeout=1.0)
-                except Exception as e:
-                    logger.debug(f"断开连接时出错: {e}")
-        
-        # 停止事件循环
-        if self.loop and not self.loop.is_closed():
-            self.loop.call_soon_threadsafe(self.loop.stop)
-            
-            # 等待循环实际停止
-            import time
-            max_wait = 10  # 最多等待1秒
-            while self.loop.is_running() and max_wait > 0:
-                time.sleep(0.1)
-                max_wait -= 1
-        
-        # 等待线程结束
-        if self.client_thread and self.client_thread.is_alive():
-            self.client_thread.join(timeout=2)
-        
-        # 关闭事件循环
-        if self.loop and not self.loop.is_closed():
+        loop = self.loop
+        if loop and not loop.is_closed():
+            # 在事件循环中完成断开和任务取消，等待其结果
+            future = asyncio.run_coroutine_threadsafe(self._shutdown(), loop)
             try:
-                self.loop.close()
+                future.result(timeout=2.0)
             except Exception as e:
-                logger.debug(f"关闭事件循环时出错: {e}")
+                logger.debug("停止客户端时出错: %s", e)
+        
+        self._connect_future = None
         
         logger.debug("WebSocket客户端已停止")
     
-    async def _disconnect_async(self):
-        """异步断开连接（内部使用）"""
-        try:
-            if self.websocket:
-                await self.websocket.close()
-                self.websocket = None
-            self.connected = False
-            self.authenticated = False
-        except Exception as e:
-            logger.debug(f"异步断开连接时出错: {e}")
+    async def _shutdown(self):
+        """断开连接并取消本客户端的所有任务（不影响共享事件循环中的其他任务）"""
+        await self.disconnect()
+        
+        # 取消连接任务（其下的接收、心跳和发送任务随之取消）
+        task = self._connect_task
+        self._connect_task = None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
     
     # 回调函数设置器
     def set_on_connected_callback(self, callback: Callable):
@@ -509,9 +656,13 @@ class WebSocketClient:
         """设置错误回调"""
         self.on_error_callback = callback
     
+    def set_on_srt_ready_callback(self, callback: Callable):
+        """设置SRT就绪回调"""
+        self.on_srt_ready_callback = callback
+    
     def cleanup(self):
         """清理资源"""
         try:
             self.stop()
         except Exception as e:
-            logger.debug(f"清理资源时出错: {e}")
\ No newline at end of file
+            logger.debug("清理资源时出错: %s", e)
\ No newline at end of file
@@ -1,17 +1,92 @@
 # network/websocket_server.py - WebSocket服务器
 import asyncio
 import websockets
-import json
+import sys
 import threading
-from typing import Dict, Set, Optional, Any, Callable
+import time
+from collections import deque
+from functools import partial
+from urllib.parse import unquote
+from typing import Dict, List, Set, Optional, Any, Callable
 from datetime import datetime
 import config
+from utils import json_codec
 from utils.logger import get_logger
 from utils.network_utils import NetworkUtils
+from network.event_loop import new_event_loop
 from streaming.ffmpeg_manager import FFmpegManager
 
 logger = get_logger(__name__)
 
+# 每条入站消息都要比较的消息类型，绑定为模块常量
+_WS_AUTH = config.WS_TYPE_AUTH
+_WS_CHAT = config.WS_TYPE_CHAT
+_WS_HEARTBEAT = config.WS_TYPE_HEARTBEAT
+
+class _ClientOutbox:
+    """单个客户端的发送队列：所有发往该客户端的消息由一个写任务按入队顺序发送"""
+    
+    __slots__ = ("websocket", "_queue", "_waker", "_task")
+    
+    _CLOSE = object()  # 发送完队列中的消息后关闭连接
+    
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self._queue = deque()
+        self._waker: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """启动写任务（须在事件循环中调用）"""
+        self._task = asyncio.ensure_future(self._run())
+    
+    def push(self, frame: bytes):
+        """消息入队"""
+        self._queue.append(frame)
+        waker = self._waker
+        if waker is not None and not waker.done():
+            waker.set_result(None)
+    
+    def push_close(self):
+        """在已入队的消息之后关闭连接"""
+        self.push(self._CLOSE)
+    
+    def cancel(self):
+        """取消写任务"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+    
+    async def _run(self):
+        """写任务：队列为空时等待唤醒，否则依次发送"""
+        loop = asyncio.get_event_loop()
+        queue = self._queue
+        websocket = self.websocket
+        try:
+            while True:
+                if not queue:
+                    self._waker = loop.create_future()
+                    await self._waker
+                    self._waker = None
+                    continue
+                
+                frame = queue.popleft()
+                if frame is self._CLOSE:
+                    await websocket.close()
+                    return
+                try:
+                    await websocket.send(frame)
+                except websockets.exceptions.ConnectionClosed:
+                    return
+                except Exception as e:
+                    logger.error(f"发送消息失败: {e}")
+        
+        except asyncio.CancelledError:
+            pass
+        finally:
+            queue.clear()
+            self._waker = None
+
 class WebSocketServer:
     """WebSocket服务器（发送端使用）"""
     
@@ -24,22 +99,49 @@ class WebSocketServer:
         self.verification_code = verification_code or config.NETWORK_DEFAULTS["verification_code"]
         self.clients: Dict[str, Dict[str, Any]] = {}  # client_id -> client_info
         self.nicknames: Set[str] = set()  # 已使用的昵称
+        self._nickname_suffix: Dict[str, int] = {}  # 重复昵称 -> 下一个尝试的数字后缀
+        self._authed_sockets: Set[Any] = set()  # 已认证客户端的连接（广播目标）
+        self._outboxes: Dict[Any, _ClientOutbox] = {}  # 连接 -> 发送队列
         self.server = None
         self.loop = None
         self.server_thread = None
         self.running = False
         self.ffmpeg_manager = FFmpegManager()
         self.next_srt_port = config.NETWORK_DEFAULTS["srt_base_port"]
+        self._free_srt_ports = deque()  # 客户端离开后回收的SRT端口，优先复用
         self.bind_ip = "0.0.0.0"
         self.port = config.NETWORK_DEFAULTS["websocket_port"]
+        self._rtmp_url = f"rtmp://127.0.0.1:{config.NGINX_CONFIG['rtmp']['port']}/live/stream"  # 分发进程的拉流地址
         
         # 发送端自己的信息
         self.sender_nickname = None
         self.sender_id = "sender"
         
+        # 在线成员列表（成员变化时整体替换，已返回的列表不会被修改）及其编码缓存
+        self._members: List[Dict[str, str]] = []
+        self._members_frame: Optional[bytes] = None
+        
         # 回调函数
         self.on_message_callback: Optional[Callable] = None
         self.on_member_update_callback: Optional[Callable] = None
+        
+        # 预编码的固定消息帧
+        self._heartbeat_frame = json_codec.dumps_bytes({"type": config.WS_TYPE_HEARTBEAT})
+        self._auth_failed_frame = json_codec.dumps_bytes({
+            "type": config.WS_TYPE_AUTH_FAILED,
+            "message": "验证码错误"
+        })
+        self._error_frames: Dict[str, bytes] = {}  # 错误信息 -> 已编码的错误消息（错误信息为固定文本）
+        
+        # 已认证客户端的消息类型 -> 处理方法
+        self._authed_dispatch: Dict[str, Callable] = {
+            _WS_CHAT: self._handle_chat,
+            _WS_HEARTBEAT: self._handle_heartbeat,
+        }
+        
+        # UI线程提交的聊天消息，由事件循环批量取出发送
+        self._ui_messages = deque()
+        self._ui_drain_pending = False
     
     async def start(self, host: str, port: int, sender_nickname: str) -> bool:
         """
@@ -54,6 +156,8 @@ class WebSocketServer:
             self.port = port
             self.sender_nickname = sender_nickname
             self.nicknames.add(sender_nickname)  # 添加发送端昵称
+            if sender_nickname:
+                self._set_members([{"nickname": sender_nickname, "role": "sender"}])
             
             # 处理IPv6地址
             if NetworkUtils.is_valid_ipv6(host):
@@ -67,7 +171,13 @@ class WebSocketServer:
                 port,
                 ping_interval=20,
                 ping_timeout=10,
-                close_timeout=10  # 添加关闭超时
+                close_timeout=10,  # 添加关闭超时
+                compression=config.NETWORK_DEFAULTS["websocket_compression"],
+                # 放宽收发缓冲，避免成员更新+加入+聊天的突发消息频繁触发暂停/恢复读写
+                # 每个客户端最坏占用：接收 max_queue*max_size = 256*64KiB = 16MiB，发送 write_limit = 1MiB
+                max_size=config.NETWORK_DEFAULTS["websocket_max_size"],
+                max_queue=256,
+                write_limit=2 ** 20
             )
             
             self.running = True
@@ -75,7 +185,7 @@ class WebSocketServer:
             
             # 通知回调：发送端加入
             if self.on_member_update_callback:
-                await self._notify_member_update()
+                self._notify_member_update()
             
             return True
         
@@ -87,7 +197,7 @@ class WebSocketServer:
         """在独立线程中启动服务器"""
         try:
             def run_server():
-                self.loop = asyncio.new_event_loop()
+                self.loop = new_event_loop()
                 asyncio.set_event_loop(self.loop)
                 
                 # 启动服务器
@@ -100,7 +210,6 @@ class WebSocketServer:
             self.server_thread.start()
             
             # 等待服务器启动
-            import time
             time.sleep(1)
             
             return self.running
@@ -122,35 +231,48 @@ class WebSocketServer:
             "remote_address": websocket.remote_address if hasattr(websocket, 'remote_address') else None
         }
         
+        # 所有发往该客户端的消息都经由发送队列，保证顺序
+        outbox = _ClientOutbox(websocket)
+        self._outboxes[websocket] = outbox
+        outbox.start()
+        
         try:
             # 获取客户端地址信息
             remote_addr = websocket.remote_address if hasattr(websocket, 'remote_address') else "unknown"
             logger.info(f"新客户端连接: {client_id} 来自 {remote_addr}")
             
-            # 等待认证
+            # 握手请求头携带认证信息时直接认证，省去一次AUTH消息往返
+            headers = getattr(websocket, "request_headers", None)
+            if headers is not None and config.WS_AUTH_CODE_HEADER in headers:
+                nickname = headers.get(config.WS_NICKNAME_HEADER)
+                await self._handle_auth(client_id, client_info, {
+                    "code": headers[config.WS_AUTH_CODE_HEADER],
+                    "nickname": unquote(nickname) if nickname else None
+                })
+            
+            # 接收消息（未通过握手认证的旧客户端仍可发送AUTH消息认证）
             async for message in websocket:
                 try:
-                    data = json.loads(message)
+                    data = json_codec.loads(message)
                     msg_type = data.get("type")
                     
                     if not client_info["authenticated"]:
                         # 处理认证
-                        if msg_type == config.WS_MESSAGE_TYPES["AUTH"]:
+                        if msg_type == _WS_AUTH:
                             await self._handle_auth(client_id, client_info, data)
                         else:
-                            await self._send_error(websocket, "请先进行身份验证")
+                            self._send_error(websocket, "请先进行身份验证")
                     else:
                         # 处理已认证客户端的消息
-                        if msg_type == config.WS_MESSAGE_TYPES["CHAT"]:
-                            await self._handle_chat(client_id, data)
-                        elif msg_type == config.WS_MESSAGE_TYPES["HEARTBEAT"]:
-                            await websocket.send(json.dumps({"type": config.WS_MESSAGE_TYPES["HEARTBEAT"]}))
+                        handler = self._authed_dispatch.get(msg_type)
+                        if handler:
+                            await handler(client_id, data, websocket)
                         else:
                             logger.warning(f"未知消息类型: {msg_type}")
                 
-                except json.JSONDecodeError:
+                except json_codec.JSONDecodeError:
                     logger.error(f"无效的JSON消息: {message}")
-                    await self._send_error(websocket, "消息格式错误")
+                    self._send_error(websocket, "消息格式错误")
                 except Exception as e:
                     logger.error(f"处理消息时出错: {e}")
         
@@ -163,6 +285,8 @@ class WebSocketServer:
         finally:
             # 清理断开的客户端
             await self._cleanup_client(client_id)
+            self._outboxes.pop(websocket, None)
+            outbox.cancel()
     
     async def _handle_auth(self, client_id: str, client_info: Dict, data: Dict):
         """处理认证请求"""
@@ -172,42 +296,44 @@ class WebSocketServer:
         
         # 验证验证码
         if code != self.verification_code:
-            await self._send_message(websocket, {
-                "type": config.WS_MESSAGE_TYPES["AUTH_FAILED"],
-                "message": "验证码错误"
-            })
-            await websocket.close()
+            self._send_raw_message(websocket, self._auth_failed_frame)
+            self._close_after_send(websocket)
             return
         
         # 检查昵称是否重复
         if nickname in self.nicknames:
-            # 为昵称添加数字后缀
+            # 为昵称添加数字后缀（从上次分配的后缀继续，避免每次从2开始重新扫描）
             original_nickname = nickname
-            counter = 2
+            counter = self._nickname_suffix.get(original_nickname, 2)
             while f"{original_nickname}_{counter}" in self.nicknames:
                 counter += 1
+            self._nickname_suffix[original_nickname] = counter + 1
             nickname = f"{original_nickname}_{counter}"
             logger.info(f"昵称重复，自动更改为: {nickname}")
         
+        # 驻留昵称：角色名昵称与配置中的常量共享同一对象，集合比较可走身份快速路径
+        if isinstance(nickname, str):
+            nickname = sys.intern(nickname)
+        
         # 分配SRT端口
         srt_port = self._allocate_srt_port()
         if srt_port is None:
-            await self._send_error(websocket, "无法分配SRT端口")
-            await websocket.close()
+            self._send_error(websocket, "无法分配SRT端口")
+            self._close_after_send(websocket)
             return
         
         # 启动RTMP到SRT转换
-        rtmp_url = f"rtmp://127.0.0.1:{config.NGINX_CONFIG['rtmp']['port']}/live/stream"
         success = self.ffmpeg_manager.start_rtmp_to_srt(
-            rtmp_url=rtmp_url,
+            rtmp_url=self._rtmp_url,
             srt_port=srt_port,
             bind_ip=self.bind_ip,
-            process_name=f"client_{nickname}_{srt_port}"
+            process_name=f"client_{nickname}_{srt_port}",
+            on_ready=partial(self._notify_srt_ready, websocket, srt_port)
         )
         
         if not success:
-            await self._send_error(websocket, "无法启动流转发服务")
-            await websocket.close()
+            self._send_error(websocket, "无法启动流转发服务")
+            self._close_after_send(websocket)
             return
         
         # 认证成功
@@ -216,33 +342,48 @@ class WebSocketServer:
         client_info["srt_port"] = srt_port
         
         self.clients[client_id] = client_info
+        self._authed_sockets.add(websocket)
         self.nicknames.add(nickname)
+        self._set_members(self._members + [{"nickname": nickname, "role": "receiver"}])
         
         # 发送认证成功消息
-        await self._send_message(websocket, {
-            "type": config.WS_MESSAGE_TYPES["AUTH_SUCCESS"],
+        self._send_message(websocket, {
+            "type": config.WS_TYPE_AUTH_SUCCESS,
             "nickname": nickname,
             "srt_port": srt_port,
             "server_ip": self.bind_ip
         })
         
         # 广播用户加入消息
-        await self._broadcast_message({
-            "type": config.WS_MESSAGE_TYPES["JOIN"],
+        self._broadcast_message({
+            "type": config.WS_TYPE_JOIN,
             "nickname": nickname,
             "message": f"{nickname} 加入了放映室"
         })
         
-        # 发送成员列表
-        await self._send_members_list(websocket)
+        # 发送成员列表（与成员更新广播共用同一份编码结果）
+        self._send_members_list(websocket)
         
         # 通知回调
         if self.on_member_update_callback:
-            await self._notify_member_update()
+            self._notify_member_update()
         
         logger.info(f"客户端认证成功: {nickname} (SRT端口: {srt_port})")
     
-    async def _handle_chat(self, client_id: str, data: Dict):
+    def _notify_srt_ready(self, websocket, srt_port: int):
+        """分发进程就绪时通知对应客户端（在FFmpeg读取线程中调用）"""
+        if self.loop and self.running:
+            # 认证成功消息在启动分发进程的同一轮事件循环中入队，此消息总在其后
+            self.loop.call_soon_threadsafe(self._send_message, websocket, {
+                "type": config.WS_TYPE_SRT_READY,
+                "srt_port": srt_port
+            })
+    
+    async def _handle_heartbeat(self, client_id: str, data: Dict, websocket):
+        """回复心跳"""
+        self._send_raw_message(websocket, self._heartbeat_frame)
+    
+    async def _handle_chat(self, client_id: str, data: Dict, websocket):
         """处理聊天消息"""
         if client_id not in self.clients:
             return
@@ -253,13 +394,13 @@ class WebSocketServer:
         
         # 广播聊天消息
         chat_data = {
-            "type": config.WS_MESSAGE_TYPES["CHAT"],
+            "type": config.WS_TYPE_CHAT,
             "nickname": nickname,
             "message": message,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": time.time_ns()  # 纳秒级Unix时间戳，由接收方按需格式化
         }
         
-        await self._broadcast_message(chat_data)
+        self._broadcast_message(chat_data)
         
         # 通知回调（不重复显示）
         if self.on_message_callback:
@@ -267,18 +408,22 @@ class WebSocketServer:
     
     async def send_chat_message(self, message: str):
         """发送端发送聊天消息"""
+        self._send_sender_chat(message)
+    
+    def _send_sender_chat(self, message: str):
+        """广播发送端的聊天消息（在事件循环线程中调用）"""
         if not self.sender_nickname:
             return
         
         chat_data = {
-            "type": config.WS_MESSAGE_TYPES["CHAT"],
+            "type": config.WS_TYPE_CHAT,
             "nickname": self.sender_nickname,
             "message": message,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": time.time_ns()  # 纳秒级Unix时间戳，由接收方按需格式化
         }
         
         # 广播给所有客户端
-        await self._broadcast_message(chat_data)
+        self._broadcast_message(chat_data)
         
         # 通知回调显示在自己的聊天框
         if self.on_message_callback:
@@ -287,10 +432,19 @@ class WebSocketServer:
     def send_chat_message_sync(self, message: str):
         """同步发送聊天消息（供UI线程调用）"""
         if self.loop and self.running:
-            asyncio.run_coroutine_threadsafe(
-                self.send_chat_message(message),
-                self.loop
-            )
+            self._ui_messages.append(message)
+            # 已有待执行的取出任务时不再唤醒事件循环
+            if not self._ui_drain_pending:
+                self._ui_drain_pending = True
+                self.loop.call_soon_threadsafe(self._drain_ui_messages)
+    
+    def _drain_ui_messages(self):
+        """取出UI线程提交的所有聊天消息并发送"""
+        # 先清除标志再取出，取出期间追加的消息会再次调度
+        self._ui_drain_pending = False
+        messages = self._ui_messages
+        while messages:
+            self._send_sender_chat(messages.popleft())
     
     async def _cleanup_client(self, client_id: str):
         """清理断开的客户端"""
@@ -301,84 +455,96 @@ class WebSocketServer:
         nickname = client_info["nickname"]
         srt_port = client_info["srt_port"]
         
-        # 停止FFmpeg进程
+        # 停止FFmpeg进程并回收端口
         if srt_port:
             process_name = f"client_{nickname}_{srt_port}"
-            self.ffmpeg_manager.stop_process(process_name)
+            if self.ffmpeg_manager.stop_process(process_name):
+                self._free_srt_ports.append(srt_port)
         
         # 移除客户端记录
         del self.clients[client_id]
+        self._authed_sockets.discard(client_info["websocket"])
         if nickname:
             self.nicknames.discard(nickname)
+            self._set_members([
+                member for member in self._members
+                if member["role"] != "receiver" or member["nickname"] != nickname
+            ])
         
         # 广播用户离开消息
         if nickname:
-            await self._broadcast_message({
-                "type": config.WS_MESSAGE_TYPES["LEAVE"],
+            self._broadcast_message({
+                "type": config.WS_TYPE_LEAVE,
                 "nickname": nickname,
                 "message": f"{nickname} 离开了放映室"
             })
         
         # 通知回调
         if self.on_member_update_callback:
-            await self._notify_member_update()
+            self._notify_member_update()
         
         logger.debug(f"客户端已清理: {nickname}")
     
-    async def _broadcast_message(self, data: Dict):
+    def _broadcast_message(self, data: Dict):
         """广播消息给所有已认证的客户端"""
-        message = json.dumps(data, ensure_ascii=False)
-        
-        # 收集所有需要发送的任务
-        tasks = []
-        for client_info in self.clients.values():
-            if client_info["authenticated"]:
-                websocket = client_info["websocket"]
-                tasks.append(self._send_raw_message(websocket, message))
-        
-        # 并发发送
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+        # 以二进制帧发送UTF-8 JSON，客户端可直接解析bytes
+        self._broadcast_encoded(json_codec.dumps_bytes(data))
+    
+    def _broadcast_encoded(self, message: bytes):
+        """广播已编码的消息（只编码一次，所有接收者共用）"""
+        # 放入各客户端的发送队列，与单独发送的消息保持先后顺序
+        outboxes = self._outboxes
+        for websocket in self._authed_sockets:
+            outbox = outboxes.get(websocket)
+            if outbox is not None:
+                outbox.push(message)
     
-    async def _send_message(self, websocket, data: Dict):
+    def _send_message(self, websocket, data: Dict):
         """发送消息给指定客户端"""
-        try:
-            message = json.dumps(data, ensure_ascii=False)
-            await websocket.send(message)
-        except Exception as e:
-            logger.error(f"发送消息失败: {e}")
+        self._send_raw_message(websocket, json_codec.dumps_bytes(data))
     
-    async def _send_raw_message(self, websocket, message: str):
-        """发送原始消息"""
-        try:
-            await websocket.send(message)
-        except Exception as e:
-            logger.error(f"发送消息失败: {e}")
+    def _send_raw_message(self, websocket, message: bytes):
+        """发送已编码的消息给指定客户端（放入其发送队列）"""
+        outbox = self._outboxes.get(websocket)
+        if outbox is not None:
+            outbox.push(message)
+    
+    def _close_after_send(self, websocket):
+        """发送完已入队的消息后关闭客户端连接"""
+        outbox = self._outboxes.get(websocket)
+        if outbox is not None:
+            outbox.push_close()
     
-    async def _send_error(self, websocket, error_message: str):
+    def _send_error(self, websocket, error_message: str):
         """发送错误消息"""
-        await self._send_message(websocket, {
-            "type": config.WS_MESSAGE_TYPES["ERROR"],
-            "message": error_message
-        })
+        frame = self._error_frames.get(error_message)
+        if frame is None:
+            frame = json_codec.dumps_bytes({
+                "type": config.WS_TYPE_ERROR,
+                "message": error_message
+            })
+            self._error_frames[error_message] = frame
+        self._send_raw_message(websocket, frame)
+    
+    def _get_members_frame(self) -> bytes:
+        """获取编码后的成员列表消息（成员变化后首次调用时编码）"""
+        if self._members_frame is None:
+            self._members_frame = json_codec.dumps_bytes({
+                "type": config.WS_TYPE_MEMBERS,
+                "members": self._members
+            })
+        return self._members_frame
     
-    async def _send_members_list(self, websocket):
+    def _send_members_list(self, websocket):
         """发送成员列表"""
-        members = self.get_online_members()
-        await self._send_message(websocket, {
-            "type": config.WS_MESSAGE_TYPES["MEMBERS"],
-            "members": members
-        })
+        self._send_raw_message(websocket, self._get_members_frame())
     
-    async def _notify_member_update(self):
+    def _notify_member_update(self):
         """通知成员列表更新"""
-        members = self.get_online_members()
+        members = self._members
         
         # 广播成员列表更新
-        await self._broadcast_message({
-            "type": config.WS_MESSAGE_TYPES["MEMBERS"],
-            "members": members
-        })
+        self._broadcast_encoded(self._get_members_frame())
         
         # 触发回调
         if self.on_member_update_callback:
@@ -389,27 +555,19 @@ class WebSocketServer:
     
     def get_online_members(self) -> list:
         """获取在线成员列表"""
-        members = []
-        
-        # 添加发送端
-        if self.sender_nickname:
-            members.append({
-                "nickname": self.sender_nickname,
-                "role": "sender"
-            })
-        
-        # 添加所有客户端
-        for client_info in self.clients.values():
-            if client_info["authenticated"] and client_info["nickname"]:
-                members.append({
-                    "nickname": client_info["nickname"],
-                    "role": "receiver"
-                })
-        
-        return members
+        return self._members
+    
+    def _set_members(self, members: List[Dict[str, str]]):
+        """替换成员列表并使编码缓存失效"""
+        self._members = members
+        self._members_frame = None
     
     def _allocate_srt_port(self) -> Optional[int]:
         """分配可用的SRT端口"""
+        # 优先复用已回收的端口（其转发进程已停止），无需探测
+        if self._free_srt_ports:
+            return self._free_srt_ports.popleft()
+        
         port = NetworkUtils.find_available_port(self.next_srt_port)
         if port:
             self.next_srt_port = port + 1
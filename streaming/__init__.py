@@ -4,14 +4,25 @@
 包含FFmpeg、MPV和Nginx的管理器
 """
 
-from .ffmpeg_manager import FFmpegManager
-from .mpv_player import MPVPlayer
-from .nginx_manager import NginxManager
+import importlib
 
-__all__ = [
-    'FFmpegManager',
-    'MPVPlayer',
-    'NginxManager'
-]
+# 子模块在首次访问对应名称时才导入（PEP 562），导入其中一个子模块不会连带加载其余子模块
+# 导出名称 -> 所在子模块
+_EXPORTS = {
+    'FFmpegManager': '.ffmpeg_manager',
+    'MPVPlayer':     '.mpv_player',
+    'NginxManager':  '.nginx_manager'
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    """首次访问导出名称时导入对应的子模块"""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name = _EXPORTS[name]
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
 
 __version__ = '1.0.0'
\ No newline at end of file
@@ -1,8 +1,9 @@
 # streaming/ffmpeg_manager.py - FFmpeg管理器
-import os
+import logging
+import re
 import time
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 from datetime import datetime
 import config
 from utils.logger import get_logger, get_ffmpeg_logger
@@ -11,6 +12,15 @@ from utils.network_utils import NetworkUtils
 
 logger = get_logger(__name__)
 
+# FFmpeg统计行中的字段，例如 "frame=  100 fps= 25 ... time=00:00:04.00 bitrate=2000.0kbits/s"
+_STATS_RE = re.compile(r'\b(fps|bitrate|time)=\s*(\S+)')
+
+# 需要在控制台提示的错误行（不区分大小写），绝大多数行不命中，无需生成小写副本
+_ERROR_RE = re.compile(r'error|failed', re.IGNORECASE)
+
+# 统计信息只用于查询，不需要逐行解析（秒）
+STATS_PARSE_INTERVAL = 1.0
+
 class FFmpegManager:
     """FFmpeg进程管理器"""
     
@@ -18,6 +28,29 @@ class FFmpegManager:
         self.process_manager = get_process_manager()
         self.ffmpeg_path = Path(config.EXTERNAL_PROGRAMS["ffmpeg"])
         self.processes: Dict[str, Dict[str, Any]] = {}
+        self._ready_callbacks: Dict[str, Callable] = {}  # 进程名 -> 就绪回调（触发一次）
+        self._last_stats_ts: Dict[str, float] = {}  # 进程名 -> 上次解析统计信息的时间（time.monotonic）
+        self._url_hosts: Dict[str, str] = {}  # 绑定IP -> URL中使用的主机部分（绑定IP很少变化）
+        
+        # 统计信息只在调试日志级别下输出
+        self._debug_args = config.FFMPEG_PARAMS["debug_extra"] if config.LOGGING["level"] == "DEBUG" else ()
+        
+        # 预先拼好命令中不变的部分（配置在导入时即确定），启动进程时只需填入地址
+        params = config.FFMPEG_PARAMS
+        low_latency_args = params["low_latency_input"] if config.NETWORK_DEFAULTS["low_latency_mode"] else ()
+        head = (str(self.ffmpeg_path), *params["common"], *self._debug_args)
+        self._srt_to_rtmp_head = (*head, *params["srt_to_rtmp"]["input"], *low_latency_args, "-i")
+        self._srt_to_rtmp_output = params["srt_to_rtmp"]["output"]
+        # 需要就绪通知时提高日志级别（在通用参数之后，覆盖其中的-loglevel）
+        rtmp_to_srt_input = (*params["rtmp_to_srt"]["input"], *low_latency_args, "-i")
+        self._rtmp_to_srt_head = (*head, *rtmp_to_srt_input)
+        # info级别下FFmpeg默认每秒输出一行统计信息，非调试模式用-nostats关闭，只保留就绪标记
+        ready_args = params["ready_detect"] if self._debug_args else (*params["ready_detect"], "-nostats")
+        self._rtmp_to_srt_ready_head = (*head, *ready_args, *rtmp_to_srt_input)
+        self._rtmp_to_srt_output = params["rtmp_to_srt"]["output"]
+        self._srt_input_query = f"?mode=listener&latency={params['srt_input']['latency']}"
+        self._srt_output_query = f"?mode=listener&latency={params['srt_output']['latency']}"
+        self._default_rtmp_url = f"rtmp://127.0.0.1:{config.NGINX_CONFIG['rtmp']['port']}/live/stream"
         
         # 验证FFmpeg是否存在
         if not self.ffmpeg_path.exists():
@@ -48,34 +81,14 @@ class FFmpegManager:
         
         # 默认RTMP地址
         if rtmp_url is None:
-            rtmp_url = f"rtmp://127.0.0.1:{config.NGINX_CONFIG['rtmp']['port']}/live/stream"
+            rtmp_url = self._default_rtmp_url
         
         # 处理IPv6地址格式
-        if NetworkUtils.is_valid_ipv6(bind_ip):
-            bind_ip = NetworkUtils.format_ipv6_for_url(bind_ip)
+        bind_ip = self._format_bind_ip(bind_ip)
         
         # 构建FFmpeg命令
-        command = [str(self.ffmpeg_path)]
-        command.extend(config.FFMPEG_PARAMS["common"])
-        
-        # 添加分析和探测参数（在输入之前）
-        command.extend([
-            "-analyzeduration", "10000000",  # 10秒分析时长
-            "-probesize", "10000000",        # 10MB探测大小
-            "-fflags", "+genpts"             # 生成PTS
-        ])
-        
-        # SRT输入参数
-        srt_url = f"srt://{bind_ip}:{srt_port}?mode=listener&latency={config.FFMPEG_PARAMS['srt_input']['latency']}"
-        command.extend(["-i", srt_url])
-        
-        # 输出参数（不转码）
-        command.extend([
-            "-c", "copy",
-            "-f", "flv",
-            "-flvflags", "no_duration_filesize",
-            rtmp_url
-        ])
+        srt_url = f"srt://{bind_ip}:{srt_port}{self._srt_input_query}"
+        command = [*self._srt_to_rtmp_head, srt_url, *self._srt_to_rtmp_output, rtmp_url]
         
         # 获取专用日志器
         process_logger = get_ffmpeg_logger(process_name)
@@ -108,7 +121,8 @@ class FFmpegManager:
         rtmp_url: str,
         srt_port: int,
         bind_ip: str = "0.0.0.0",
-        process_name: str = None
+        process_name: str = None,
+        on_ready: Optional[Callable] = None
     ) -> bool:
         """
         启动RTMP到SRT的转换进程
@@ -117,6 +131,7 @@ class FFmpegManager:
             srt_port: SRT监听端口
             bind_ip: SRT绑定IP地址
             process_name: 进程名称
+            on_ready: 输入流打开、SRT即将开始监听时的回调（在读取线程中调用）
         """
         if process_name is None:
             process_name = f"rtmp_to_srt_{srt_port}"
@@ -126,33 +141,14 @@ class FFmpegManager:
             return False
         
         # 处理IPv6地址格式
-        if NetworkUtils.is_valid_ipv6(bind_ip):
-            bind_ip = NetworkUtils.format_ipv6_for_url(bind_ip)
+        bind_ip = self._format_bind_ip(bind_ip)
         
         # 构建FFmpeg命令
-        command = [str(self.ffmpeg_path)]
-        command.extend(config.FFMPEG_PARAMS["common"])
-        
-        # 添加分析和探测参数（在输入之前）
-        command.extend([
-            "-analyzeduration", "5000000",   # 5秒分析时长（RTMP相对稳定）
-            "-probesize", "5000000",         # 5MB探测大小
-            "-fflags", "+genpts"             # 生成PTS
-        ])
-        
-        # RTMP输入参数
-        command.extend([
-            "-re",  # 按原始帧率读取
-            "-i", rtmp_url
-        ])
-        
-        # SRT输出参数
-        srt_url = f"srt://{bind_ip}:{srt_port}?mode=listener&latency={config.FFMPEG_PARAMS['srt_output']['latency']}"
-        command.extend([
-            "-c", "copy",  # 不转码
-            "-f", "mpegts",  # SRT使用MPEG-TS封装
-            srt_url
-        ])
+        head = self._rtmp_to_srt_ready_head if on_ready is not None else self._rtmp_to_srt_head
+        srt_url = f"srt://{bind_ip}:{srt_port}{self._srt_output_query}"
+        command = [*head, rtmp_url, *self._rtmp_to_srt_output, srt_url]
+        if on_ready is not None:
+            self._ready_callbacks[process_name] = on_ready
         
         # 获取专用日志器
         process_logger = get_ffmpeg_logger(process_name)
@@ -178,8 +174,17 @@ class FFmpegManager:
             logger.info(f"RTMP->SRT转换进程已启动 (端口: {srt_port})")
             return True
         
+        self._ready_callbacks.pop(process_name, None)
         return False
     
+    def _format_bind_ip(self, bind_ip: str) -> str:
+        """将绑定IP格式化为URL主机部分（IPv6加方括号），结果按IP缓存"""
+        host = self._url_hosts.get(bind_ip)
+        if host is None:
+            host = NetworkUtils.format_ipv6_for_url(bind_ip)
+            self._url_hosts[bind_ip] = host
+        return host
+    
     def stop_process(self, process_name: str) -> bool:
         """停止指定的FFmpeg进程"""
         if process_name not in self.processes:
@@ -190,6 +195,8 @@ class FFmpegManager:
         
         if success:
             del self.processes[process_name]
+            self._ready_callbacks.pop(process_name, None)
+            self._last_stats_ts.pop(process_name, None)
             logger.debug(f"FFmpeg进程已停止: {process_name}")
             return True
         
@@ -238,53 +245,64 @@ class FFmpegManager:
         # 只在控制台显示关键信息
         if "Stream #" in line:
             logger.debug(f"[{process_name}] 检测到流")
-        elif "fps=" in line:
-            # 解析统计信息但不输出
-            self._parse_stats(process_name, line)
     
     def _handle_ffmpeg_error(self, process_name: str, line: str, process_logger):
         """处理FFmpeg错误输出"""
-        # 记录到文件
-        process_logger.error(line)
-        
-        # 只在控制台输出重要错误
-        if "error" in line.lower() or "failed" in line.lower():
-            if "Connection refused" in line or "Connection reset" in line:
-                logger.error(f"[{process_name}] 连接失败，可能需要重启")
-            elif "Invalid data" in line:
-                logger.warning(f"[{process_name}] 接收到无效数据")
-            elif "dimensions not set" not in line.lower():  # 忽略dimensions not set错误
-                logger.error(f"[{process_name}] FFmpeg错误")
-        elif "warning" in line.lower() and "input queue" not in line.lower():
-            # 忽略input queue满的警告
-            pass
+        # FFmpeg的所有日志都输出到stderr，只有错误行按ERROR记录（立即写入文件），其余写入缓冲区
+        is_error = _ERROR_RE.search(line) is not None
+        process_logger.log(logging.ERROR if is_error else logging.INFO, line)
+        
+        # 就绪检测（每个进程只触发一次）
+        if process_name in self._ready_callbacks:
+            self._check_ready(process_name, line)
+        
+        # 统计行（-stats的进度输出在stderr中）：解析但不输出，每个进程每秒最多解析一次
+        if "fps=" in line:
+            now = time.monotonic()
+            if now - self._last_stats_ts.get(process_name, 0.0) >= STATS_PARSE_INTERVAL:
+                self._last_stats_ts[process_name] = now
+                self._parse_stats(process_name, line)
+            return
+        
+        # 只在控制台输出重要错误（警告一律忽略）
+        if not is_error:
+            return
+        if "Connection refused" in line or "Connection reset" in line:
+            logger.error(f"[{process_name}] 连接失败，可能需要重启")
+        elif "Invalid data" in line:
+            logger.warning(f"[{process_name}] 接收到无效数据")
+        elif "dimensions not set" not in line.lower():  # 忽略dimensions not set错误
+            logger.error(f"[{process_name}] FFmpeg错误")
+    
+    def _check_ready(self, process_name: str, line: str):
+        """检测FFmpeg是否已打开输入流，是则触发就绪回调"""
+        for marker in config.FFMPEG_PARAMS["ready_markers"]:
+            if marker in line:
+                callback = self._ready_callbacks.pop(process_name, None)
+                if callback:
+                    logger.debug(f"[{process_name}] 流已就绪")
+                    try:
+                        callback()
+                    except Exception as e:
+                        logger.error(f"执行就绪回调时出错: {e}")
+                return
     
     def _parse_stats(self, process_name: str, line: str):
-        """解析FFmpeg统计信息"""
-        try:
-            # 提取fps、bitrate等信息
-            stats = {}
-            
-            if "fps=" in line:
-                fps_str = line.split("fps=")[1].split()[0]
-                stats['fps'] = float(fps_str)
-            
-            if "bitrate=" in line:
-                bitrate_str = line.split("bitrate=")[1].split()[0]
-                stats['bitrate'] = bitrate_str
-            
-            if "time=" in line:
-                time_str = line.split("time=")[1].split()[0]
-                stats['time'] = time_str
-            
-            if stats:
-                if process_name in self.processes:
-                    self.processes[process_name]['stats'] = stats
-                    # 不输出到控制台，只更新内部状态
-        
-        except Exception as e:
-            # 静默处理解析错误
-            pass
+        """解析FFmpeg统计信息（一次扫描取出fps、bitrate、time）"""
+        stats = dict(_STATS_RE.findall(line))
+        if not stats:
+            return
+        
+        fps = stats.get('fps')
+        if fps is not None:
+            try:
+                stats['fps'] = float(fps)
+            except ValueError:
+                del stats['fps']
+        
+        if process_name in self.processes:
+            self.processes[process_name]['stats'] = stats
+            # 不输出到控制台，只更新内部状态
     
     def cleanup(self):
         """清理资源"""
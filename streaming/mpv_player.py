@@ -1,9 +1,11 @@
 # streaming/mpv_player.py - MPV播放器管理器
-import os
-import time
+import logging
+import random
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List, Callable
-import threading
+from typing import Optional, Callable
+from PySide6.QtCore import QTimer, QThread
 import config
 from utils.logger import get_logger
 from utils.process_manager import get_process_manager
@@ -11,6 +13,21 @@ from utils.network_utils import NetworkUtils
 
 logger = get_logger(__name__)
 
+# MPV输出中需要记录的关键信息
+_OUTPUT_RE = re.compile(r'Playing:|Video:|Audio:')
+
+# 需要提示的错误行（不区分大小写），无需为每行生成小写副本
+_ERROR_RE = re.compile(r'error|failed', re.IGNORECASE)
+
+@lru_cache(maxsize=None)
+def _get_mpv_path() -> Path:
+    """返回MPV程序路径，只在首次成功时检查文件是否存在（程序运行期间不会消失）"""
+    path = Path(config.EXTERNAL_PROGRAMS["mpv"])
+    if not path.exists():
+        logger.error(f"MPV不存在: {path}")
+        raise FileNotFoundError(f"找不到MPV: {path}")
+    return path
+
 class MPVPlayer:
     """MPV播放器管理器"""
     
@@ -21,18 +38,21 @@ class MPVPlayer:
             player_type: 播放器类型 ("sender" 或 "receiver")
         """
         self.process_manager = get_process_manager()
-        self.mpv_path = Path(config.EXTERNAL_PROGRAMS["mpv"])
+        self.mpv_path = _get_mpv_path()
         self.player_type = player_type
         self.process_name = f"mpv_{player_type}"
         self.is_playing = False
-        self.retry_thread: Optional[threading.Thread] = None
-        self.stop_retry = threading.Event()
+        # 重试播放RTMP流（由Qt事件循环中的单次定时器驱动，无需专用线程）
+        self._retry_timer: Optional[QTimer] = None
+        self._retry_active = False
+        self._retry_url: Optional[str] = None
+        self._retry_count = 0
         self.on_closed_callback: Optional[Callable] = None
         
-        # 验证MPV是否存在
-        if not self.mpv_path.exists():
-            logger.error(f"MPV不存在: {self.mpv_path}")
-            raise FileNotFoundError(f"找不到MPV: {self.mpv_path}")
+        # 预先拼好的MPV命令（程序路径 + 按类型拼好的参数，启动时只需追加流地址）
+        player_args = config.MPV_SENDER_ARGS if player_type == "sender" else config.MPV_RECEIVER_ARGS
+        self._command_head = (str(self.mpv_path), *player_args)
+        self._default_rtmp_url = f"rtmp://127.0.0.1:{config.NGINX_CONFIG['rtmp']['port']}/live/stream"
     
     def play_rtmp(self, rtmp_url: str = None, retry: bool = True) -> bool:
         """
@@ -47,17 +67,16 @@ class MPVPlayer:
         
         # 默认RTMP地址
         if rtmp_url is None:
-            rtmp_url = f"rtmp://127.0.0.1:{config.NGINX_CONFIG['rtmp']['port']}/live/stream"
+            rtmp_url = self._default_rtmp_url
         
         if retry:
-            # 启动重试线程
-            self.stop_retry.clear()
-            self.retry_thread = threading.Thread(
-                target=self._retry_play_rtmp,
-                args=(rtmp_url,),
-                daemon=True
-            )
-            self.retry_thread.start()
+            # 开始重试（须在Qt主线程中调用，后续尝试由定时器调度）
+            self._retry_url = rtmp_url
+            self._retry_count = 0
+            self._retry_active = True
+            logger.info(f"开始尝试播放RTMP流: {rtmp_url}")
+            logger.info("将持续尝试直到成功连接或手动停止...")
+            self._retry_play_rtmp()
             return True
         else:
             return self._start_mpv(rtmp_url)
@@ -90,20 +109,8 @@ class MPVPlayer:
             stream_url: 流地址
         """
         try:
-            # 构建MPV命令
-            command = [str(self.mpv_path)]
-            
-            # 添加播放器类型特定参数
-            if self.player_type == "sender":
-                command.extend(config.MPV_PARAMS["sender"])
-            else:
-                command.extend(config.MPV_PARAMS["receiver"])
-            
-            # 添加通用参数
-            command.extend(config.MPV_PARAMS["common"])
-            
-            # 添加流地址
-            command.append(stream_url)
+            # 构建MPV命令（预拼好的参数 + 流地址）
+            command = [*self._command_head, stream_url]
             
             # 启动MPV
             success = self.process_manager.start_process(
@@ -111,20 +118,13 @@ class MPVPlayer:
                 command=command,
                 stdout_callback=self._handle_output,
                 stderr_callback=self._handle_error,
-                restart_on_exit=False
+                restart_on_exit=False,
+                on_exit=self._on_process_exit  # 播放窗口被关闭时通知，无需轮询
             )
             
             if success:
                 self.is_playing = True
                 logger.info(f"MPV播放器已启动")
-                
-                # 启动监控线程
-                monitor_thread = threading.Thread(
-                    target=self._monitor_player,
-                    daemon=True
-                )
-                monitor_thread.start()
-                
                 return True
             else:
                 logger.error("启动MPV失败")
@@ -134,35 +134,44 @@ class MPVPlayer:
             logger.error(f"启动MPV时出错: {e}")
             return False
     
-    def _retry_play_rtmp(self, rtmp_url: str):
-        """持续重试播放RTMP流（用于等待流可用）- 服务端无限循环"""
-        retry_count = 0
-        retry_interval = 3  # 重试间隔（秒）
+    def _retry_play_rtmp(self):
+        """尝试播放RTMP流，失败时安排下一次尝试（用于等待流可用）- 服务端无限重试"""
+        if not self._retry_active:
+            logger.info("停止重试播放RTMP流")
+            return
         
-        logger.info(f"开始尝试播放RTMP流: {rtmp_url}")
-        logger.info("将持续尝试直到成功连接或手动停止...")
+        if self._start_mpv(self._retry_url):
+            self._retry_active = False
+            logger.debug("成功连接到RTMP流")
+            return
         
-        while not self.stop_retry.is_set():
-            if self._start_mpv(rtmp_url):
-                logger.debug("成功连接到RTMP流")
-                break
-            
-            retry_count += 1
-            logger.info(f"RTMP流暂不可用，{retry_interval}秒后重试... (尝试 {retry_count})")
-            
-            # 分段等待，以便能快速响应停止请求
-            for _ in range(retry_interval * 10):
-                if self.stop_retry.is_set():
-                    logger.info("停止重试播放RTMP流")
-                    return
-                time.sleep(0.1)
+        # 重试间隔按指数退避增长并加入随机抖动，流长时间不可用时减少MPV启动次数
+        self._retry_count += 1
+        retry_config = config.MPV_PARAMS["retry"]
+        retry_interval = min(
+            retry_config["sender_interval"] * (2 ** (self._retry_count - 1)),
+            retry_config["sender_max_interval"]
+        ) * random.uniform(0.5, 1.5)
+        logger.info(f"RTMP流暂不可用，{retry_interval:.1f}秒后重试... (尝试 {self._retry_count})")
+        
+        if self._retry_timer is None:
+            self._retry_timer = QTimer()
+            self._retry_timer.setSingleShot(True)
+            self._retry_timer.timeout.connect(self._retry_play_rtmp)
+        self._retry_timer.start(int(retry_interval * 1000))
+    
+    def _stop_retry(self):
+        """停止重试（可在任意线程中调用）"""
+        self._retry_active = False
+        # 定时器只能在其所属线程中停止；其他线程中只清除标志，定时器触发时不再尝试
+        timer = self._retry_timer
+        if timer is not None and timer.thread() == QThread.currentThread():
+            timer.stop()
     
     def stop(self) -> bool:
         """停止播放器"""
         # 停止重试
-        self.stop_retry.set()
-        if self.retry_thread and self.retry_thread.is_alive():
-            self.retry_thread.join(timeout=1)
+        self._stop_retry()
         
         if not self.is_playing:
             logger.warning("MPV未在播放")
@@ -198,42 +207,41 @@ class MPVPlayer:
         """
         self.on_closed_callback = callback
     
-    def _monitor_player(self):
-        """监控播放器状态"""
-        while self.is_playing:
-            time.sleep(1)
-            if not self.is_running():
-                self.is_playing = False
-                logger.debug("MPV播放器已关闭")
-                
-                # 触发回调
-                if self.on_closed_callback:
-                    try:
-                        self.on_closed_callback()
-                    except Exception as e:
-                        logger.error(f"执行播放器关闭回调时出错: {e}")
-                
-                break
+    def _on_process_exit(self, exit_code: int):
+        """MPV进程自行退出（在进程监控线程中调用）"""
+        if not self.is_playing:
+            return
+        self.is_playing = False
+        logger.debug("MPV播放器已关闭")
+        
+        # 触发回调
+        if self.on_closed_callback:
+            try:
+                self.on_closed_callback()
+            except Exception as e:
+                logger.error(f"执行播放器关闭回调时出错: {e}")
     
     def _handle_output(self, line: str):
         """处理MPV标准输出"""
-        # 只记录关键信息
-        if "Playing:" in line:
-            logger.debug(f"[MPV] 正在播放")
-        elif "Video:" in line or "Audio:" in line:
-            logger.debug(f"[MPV] 流信息已加载")
+        # 只记录关键信息（仅调试级别输出，其他级别下无需匹配）
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        match = _OUTPUT_RE.search(line)
+        if match is None:
+            return
+        if match.group() == "Playing:":
+            logger.debug("[MPV] 正在播放")
+        else:
+            logger.debug("[MPV] 流信息已加载")
     
     def _handle_error(self, line: str):
         """处理MPV错误输出"""
-        # 只显示重要错误
-        if "error" in line.lower() or "failed" in line.lower():
-            if "No stream found" not in line:  # 忽略等待流的消息
-                logger.error(f"[MPV] 播放错误")
-        elif "warning" in line.lower():
-            pass  # 忽略警告
+        # 只显示重要错误（警告忽略）
+        if _ERROR_RE.search(line) and "No stream found" not in line:  # 忽略等待流的消息
+            logger.error("[MPV] 播放错误")
     
     def cleanup(self):
         """清理资源"""
-        self.stop_retry.set()
+        self._stop_retry()
         if self.is_playing:
             self.stop()
\ No newline at end of file
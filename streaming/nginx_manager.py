@@ -1,27 +1,43 @@
 # streaming/nginx_manager.py - Nginx管理器
-import os
 import time
+import logging
+import socket
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
 import config
 from utils.logger import get_logger
 from utils.process_manager import get_process_manager
 
 logger = get_logger(__name__)
 
+# RTMP端口探测：启动后等待端口可连接、停止后等待端口释放（秒）
+_PORT_PROBE_INTERVAL = 0.05
+_START_READY_TIMEOUT = 3.0
+_STOP_RELEASE_TIMEOUT = 2.0
+
+@lru_cache(maxsize=None)
+def _get_nginx_path() -> Path:
+    """返回Nginx程序路径，只在首次成功时检查文件是否存在（程序运行期间不会消失）"""
+    path = Path(config.EXTERNAL_PROGRAMS["nginx"])
+    if not path.exists():
+        logger.error(f"Nginx不存在: {path}")
+        raise FileNotFoundError(f"找不到Nginx: {path}")
+    return path
+
 class NginxManager:
     """Nginx RTMP服务器管理器"""
     
     def __init__(self):
         self.process_manager = get_process_manager()
-        self.nginx_path = Path(config.EXTERNAL_PROGRAMS["nginx"])
+        self.nginx_path = _get_nginx_path()
         self.process_name = "nginx_rtmp"
         self.is_running = False
         
-        # 验证Nginx是否存在
-        if not self.nginx_path.exists():
-            logger.error(f"Nginx不存在: {self.nginx_path}")
-            raise FileNotFoundError(f"找不到Nginx: {self.nginx_path}")
+        # RTMP配置在导入时即确定，预先取出
+        rtmp_config = config.NGINX_CONFIG['rtmp']
+        self._rtmp_port = rtmp_config['port']
+        self._default_stream_key = rtmp_config['stream_key']
+        self._rtmp_url_prefix = f"rtmp://127.0.0.1:{self._rtmp_port}/{rtmp_config['app_name']}/"
     
     def start(self) -> bool:
         """启动Nginx RTMP服务器"""
@@ -47,13 +63,13 @@ class NginxManager:
             )
             
             if success:
-                # 等待Nginx完全启动
-                time.sleep(1)
+                # 等待Nginx开始监听RTMP端口（进程提前退出时立即返回）
+                self._wait_until_ready()
                 
                 # 验证是否成功启动
                 if self.process_manager.is_process_running(self.process_name):
                     self.is_running = True
-                    logger.info(f"Nginx RTMP服务器已启动 (端口: {config.NGINX_CONFIG['rtmp']['port']})")
+                    logger.info(f"Nginx RTMP服务器已启动 (端口: {self._rtmp_port})")
                     return True
                 else:
                     logger.error("Nginx启动后立即退出")
@@ -102,11 +118,38 @@ class NginxManager:
                 return False
             
             # 等待端口释放
-            time.sleep(2)
+            self._wait_for_port(accepting=False, timeout=_STOP_RELEASE_TIMEOUT)
         
         # 再启动
         return self.start()
     
+    def _is_port_accepting(self) -> bool:
+        """RTMP端口是否已有程序在监听"""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(_PORT_PROBE_INTERVAL)
+            return sock.connect_ex(("127.0.0.1", self._rtmp_port)) == 0
+    
+    def _wait_for_port(self, accepting: bool, timeout: float) -> bool:
+        """等待RTMP端口变为可连接（accepting=True）或已释放，超时返回False"""
+        deadline = time.monotonic() + timeout
+        while self._is_port_accepting() != accepting:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(_PORT_PROBE_INTERVAL)
+        return True
+    
+    def _wait_until_ready(self) -> bool:
+        """启动后等待RTMP端口可连接，Nginx进程退出或超时返回False"""
+        deadline = time.monotonic() + _START_READY_TIMEOUT
+        while self.process_manager.is_process_running(self.process_name):
+            if self._is_port_accepting():
+                return True
+            if time.monotonic() >= deadline:
+                logger.warning("等待Nginx监听RTMP端口超时")
+                return False
+            time.sleep(_PORT_PROBE_INTERVAL)
+        return False
+    
     def check_status(self) -> bool:
         """检查Nginx状态"""
         if not self.is_running:
@@ -121,23 +164,25 @@ class NginxManager:
             stream_key: 流密钥，默认使用配置中的值
         """
         if stream_key is None:
-            stream_key = config.NGINX_CONFIG['rtmp']['stream_key']
+            stream_key = self._default_stream_key
         
-        return f"rtmp://127.0.0.1:{config.NGINX_CONFIG['rtmp']['port']}/{config.NGINX_CONFIG['rtmp']['app_name']}/{stream_key}"
+        return self._rtmp_url_prefix + stream_key
     
     def _handle_output(self, line: str):
         """处理Nginx标准输出"""
-        logger.debug(f"[Nginx] {line}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[Nginx] %s", line)
     
     def _handle_error(self, line: str):
         """处理Nginx错误输出"""
         # Nginx的一些正常信息也会输出到stderr，所以根据内容判断级别
-        if "error" in line.lower() or "failed" in line.lower():
-            logger.error(f"[Nginx Error] {line}")
-        elif "warning" in line.lower():
-            logger.warning(f"[Nginx Warning] {line}")
-        else:
-            logger.debug(f"[Nginx] {line}")
+        lowered = line.lower()
+        if "error" in lowered or "failed" in lowered:
+            logger.error("[Nginx Error] %s", line)
+        elif "warning" in lowered:
+            logger.warning("[Nginx Warning] %s", line)
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[Nginx] %s", line)
     
     def cleanup(self):
         """清理资源"""
@@ -0,0 +1,155 @@
+# ui/base_setup.py - 设置界面基类
+from typing import Callable, List
+from PySide6.QtWidgets import (
+    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
+    QPushButton, QLabel, QFrame
+)
+from PySide6.QtCore import Qt, Signal
+import config
+from ui.theme import get_font
+
+# 设置界面共用的样式表（通用部分见ui/theme.py，子类可在此基础上追加）
+_colors = config.THEME["colors"]
+_fonts = config.THEME["fonts"]
+SETUP_STYLESHEET = f"""
+    QLabel {{
+        font-size: {_fonts['size_normal']}px;
+    }}
+    
+    QPushButton {{
+        font-size: {_fonts['size_normal']}px;
+    }}
+    
+    QFrame {{
+        background-color: {_colors['border']};
+    }}
+"""
+del _colors, _fonts
+
+class BaseSetupWindow(QMainWindow):
+    """设置界面基类 - 标题、表单、错误提示和按钮行等公共部分，子类只需填充表单"""
+    
+    # 信号
+    setup_completed = Signal(dict)  # 设置完成信号，传递配置参数
+    back_requested = Signal()       # 返回主界面信号
+    
+    # 窗口样式表（子类可覆盖）
+    stylesheet = SETUP_STYLESHEET
+    
+    def _init_window(self, title: str, size_key: str) -> QVBoxLayout:
+        """
+        设置窗口并创建标题和分隔线
+        Args:
+            title: 界面标题
+            size_key: config.WINDOW_SIZES中的窗口尺寸键
+        返回: 主布局
+        """
+        # 窗口设置
+        self.setWindowTitle(f"{config.APP_NAME} - {title}")
+        size = config.WINDOW_SIZES[size_key]
+        self.resize(size["width"], size["height"])
+        self.setMinimumSize(size["min_width"], size["min_height"])
+        
+        # 中心部件
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        
+        # 主布局
+        main_layout = QVBoxLayout(central_widget)
+        main_layout.setSpacing(20)
+        main_layout.setContentsMargins(30, 30, 30, 30)
+        
+        # 标题
+        title_label = QLabel(title)
+        title_label.setAlignment(Qt.AlignCenter)
+        title_label.setFont(get_font(config.THEME["fonts"]["size_title"], bold=True))
+        main_layout.addWidget(title_label)
+        
+        # 分隔线
+        separator = QFrame()
+        separator.setFrameShape(QFrame.HLine)
+        separator.setFrameShadow(QFrame.Sunken)
+        main_layout.addWidget(separator)
+        
+        return main_layout
+    
+    def _create_form(self, main_layout: QVBoxLayout) -> QGridLayout:
+        """创建设置表单并加入主布局，返回表单布局"""
+        form_widget = QWidget()
+        form_layout = QGridLayout(form_widget)
+        form_layout.setSpacing(15)
+        form_layout.setColumnStretch(1, 1)
+        main_layout.addWidget(form_widget)
+        return form_layout
+    
+    @staticmethod
+    def _add_form_row(form_layout: QGridLayout, row: int, label_text: str, widget: QWidget):
+        """添加一行表单（右对齐的标签 + 输入控件）"""
+        form_layout.addWidget(QLabel(label_text), row, 0, Qt.AlignRight)
+        form_layout.addWidget(widget, row, 1)
+    
+    def _add_footer(self, main_layout: QVBoxLayout, info_text: str,
+                    confirm_text: str, confirm_slot: Callable) -> QPushButton:
+        """
+        添加错误提示、提示信息和按钮行
+        Args:
+            main_layout: 主布局
+            info_text: 提示信息
+            confirm_text: 确认按钮文字
+            confirm_slot: 确认按钮点击处理函数
+        返回: 确认按钮
+        """
+        colors = config.THEME["colors"]
+        
+        # 输入错误提示（验证失败时显示在表单下方，无需弹出对话框）
+        self.error_label = QLabel()
+        self.error_label.setWordWrap(True)
+        self.error_label.setStyleSheet(f"color: {colors['error']};")
+        self.error_label.setVisible(False)
+        main_layout.addWidget(self.error_label)
+        
+        # 添加弹性空间
+        main_layout.addStretch()
+        
+        # 提示信息
+        info_label = QLabel(info_text)
+        info_label.setAlignment(Qt.AlignCenter)
+        info_label.setFont(get_font(config.THEME["fonts"]["size_small"]))
+        info_label.setStyleSheet(f"color: {colors['text_secondary']};")
+        main_layout.addWidget(info_label)
+        
+        # 按钮布局
+        button_layout = QHBoxLayout()
+        button_layout.setSpacing(10)
+        
+        # 返回按钮
+        self.back_button = QPushButton("返回")
+        self.back_button.setMinimumHeight(35)
+        self.back_button.clicked.connect(self.on_back_clicked, Qt.DirectConnection)
+        button_layout.addWidget(self.back_button)
+        
+        button_layout.addStretch()
+        
+        # 确认按钮
+        confirm_button = QPushButton(confirm_text)
+        confirm_button.setMinimumHeight(35)
+        confirm_button.setObjectName("primary_button")
+        confirm_button.clicked.connect(confirm_slot, Qt.DirectConnection)
+        button_layout.addWidget(confirm_button)
+        
+        main_layout.addLayout(button_layout)
+        return confirm_button
+    
+    def apply_theme(self):
+        """应用主题"""
+        self.setStyleSheet(self.stylesheet)
+    
+    def _show_errors(self, errors: List[str]) -> bool:
+        """在表单下方一次性显示所有输入错误，无错误时返回True"""
+        self.error_label.setText("\n".join(errors))
+        self.error_label.setVisible(bool(errors))
+        return not errors
+    
+    def on_back_clicked(self):
+        """返回按钮点击事件"""
+        self.back_requested.emit()
@@ -2,17 +2,94 @@
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
     QPushButton, QLabel, QLineEdit, QTextEdit, QListWidget,
-    QListWidgetItem, QFrame, QDialog, QGridLayout, QScrollArea,
-    QMessageBox, QApplication
+    QDialog, QGridLayout, QScrollArea,
+    QMessageBox
 )
-from PySide6.QtCore import Qt, Signal, QTimer, QSize
-from PySide6.QtGui import QFont, QTextCursor, QTextCharFormat, QColor, QIcon, QTextOption
+from PySide6.QtCore import Qt, Signal, QTimer
+from PySide6.QtGui import QTextCursor, QTextCharFormat, QColor, QBrush, QTextOption
 from datetime import datetime
+from typing import Optional, List, Tuple
 import config
 from utils.logger import get_logger
+from ui.theme import get_font
 
 logger = get_logger(__name__)
 
+# 聊天记录最多保留的段落数（每条消息一段），超出后自动删除最早的消息
+_MAX_CHAT_BLOCKS = 2000
+
+# 消息先缓存，间隔内到达的消息合并为一次渲染（毫秒）
+_MESSAGE_FLUSH_INTERVAL_MS = 30
+
+# 聊天室窗口样式表（主题在导入时即确定，所有窗口共用同一字符串；通用部分见ui/theme.py）
+_colors = config.THEME["colors"]
+_fonts = config.THEME["fonts"]
+_STYLESHEET = f"""
+    QTextEdit {{
+        background-color: {_colors['surface']};
+        color: {_colors['text']};
+        border: 1px solid {_colors['border']};
+        border-radius: 4px;
+        padding: 10px;
+        font-size: {_fonts['size_normal']}px;
+        font-family: {_fonts['default']};
+        line-height: 1.6;
+        selection-background-color: {_colors['primary']};
+    }}
+    
+    QListWidget {{
+        background-color: {_colors['surface']};
+        color: {_colors['text']};
+        border: 1px solid {_colors['border']};
+        border-radius: 4px;
+        padding: 5px;
+        font-size: {_fonts['size_normal']}px;
+    }}
+    
+    QListWidget::item {{
+        padding: 5px;
+        border-radius: 3px;
+        margin: 2px;
+    }}
+    
+    QListWidget::item:hover {{
+        background-color: {_colors['border']};
+    }}
+    
+    QPushButton {{
+        padding: 8px 15px;
+        font-size: {_fonts['size_normal']}px;
+    }}
+    
+    QPushButton#primary_button {{
+        font-weight: bold;
+    }}
+    
+    QPushButton#emoji_button {{
+        font-size: 20px;
+        border: 1px solid #3d3d3d;
+        border-radius: 4px;
+        padding: 0px;
+        text-align: center;
+    }}
+    
+    QPushButton#emoji_button:hover {{
+        background-color: #3d3d3d;
+        border: 2px solid #4a9eff;
+    }}
+    
+    QPushButton#emoji_button:pressed {{
+        background-color: #2d2d2d;
+    }}
+    
+    QSplitter::handle {{
+        background-color: {_colors['border']};
+        width: 2px;
+    }}
+"""
+del _colors, _fonts
+
+
 class EmojiDialog(QDialog):
     """Emoji选择对话框"""
     
@@ -49,27 +126,30 @@ class EmojiDialog(QDialog):
             
             button = QPushButton(emoji)
             button.setFixedSize(45, 45)  # 增大按钮尺寸
-            button.setStyleSheet("""
-                QPushButton {
-                    font-size: 24px;
-                    border: 1px solid #3d3d3d;
-                    border-radius: 4px;
-                    background-color: #2d2d2d;
-                    padding: 0px;
-                    line-height: 45px;
-                }
-                QPushButton:hover {
-                    background-color: #4a9eff;
-                    border: 2px solid #5aa6ff;
-                }
-                QPushButton:pressed {
-                    background-color: #3a8eef;
-                }
-            """)
-            button.clicked.connect(lambda checked, e=emoji: self.on_emoji_clicked(e))
+            button.setObjectName("emoji_btn")  # 样式由scroll_widget的样式表统一设置
+            # 所有按钮共用一个槽函数，由sender()取得表情，无需为每个按钮创建闭包
+            button.clicked.connect(self._on_button_clicked, Qt.DirectConnection)
             
             scroll_layout.addWidget(button, row, col)
         
+        # 所有表情按钮共用一份样式表，只解析一次
+        scroll_widget.setStyleSheet("""
+            QPushButton#emoji_btn {
+                font-size: 24px;
+                border: 1px solid #3d3d3d;
+                border-radius: 4px;
+                background-color: #2d2d2d;
+                padding: 0px;
+                line-height: 45px;
+            }
+            QPushButton#emoji_btn:hover {
+                background-color: #4a9eff;
+                border: 2px solid #5aa6ff;
+            }
+            QPushButton#emoji_btn:pressed {
+                background-color: #3a8eef;
+            }
+        """)
         scroll_area.setWidget(scroll_widget)
         scroll_area.setStyleSheet("""
             QScrollArea {
@@ -93,6 +173,10 @@ class EmojiDialog(QDialog):
         """)
         layout.addWidget(scroll_area)
     
+    def _on_button_clicked(self):
+        """Emoji按钮点击事件"""
+        self.on_emoji_clicked(self.sender().text())
+    
     def on_emoji_clicked(self, emoji):
         """Emoji点击事件"""
         self.emoji_selected.emit(emoji)
@@ -117,8 +201,45 @@ class ChatRoomWindow(QMainWindow):
         self.role = role
         self.nickname = nickname
         self.members = []
+        self._emoji_dialog: Optional[EmojiDialog] = None  # 首次打开时创建，之后复用
+        self._pending_messages: List[Tuple[str, str, str, bool]] = []  # 待渲染的(时间, 昵称, 消息, 是否系统消息)
+        self._init_text_formats()
         self.init_ui()
         self.apply_theme()
+        
+        # 消息渲染定时器（单次触发，有待渲染消息时启动）
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(_MESSAGE_FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self._flush_messages)
+    
+    def _init_text_formats(self):
+        """预先创建聊天记录中各部分的文本格式，每条消息直接复用"""
+        colors = config.THEME["colors"]
+        
+        # 系统消息 - 斜体和不同颜色
+        self._system_format = QTextCharFormat()
+        self._system_format.setForeground(QColor(colors["warning"]))
+        self._system_format.setFontItalic(True)
+        
+        # 时间戳
+        self._time_format = QTextCharFormat()
+        self._time_format.setForeground(QColor(colors["text_secondary"]))
+        
+        # 昵称（自己的昵称高亮）
+        self._self_nickname_format = QTextCharFormat()
+        self._self_nickname_format.setForeground(QColor(colors["primary"]))
+        self._self_nickname_format.setFontWeight(700)  # 使用数值代替QFont.Bold
+        self._other_nickname_format = QTextCharFormat()
+        self._other_nickname_format.setForeground(QColor(colors["text"]))
+        self._other_nickname_format.setFontWeight(700)
+        
+        # 消息内容
+        self._message_format = QTextCharFormat()
+        self._message_format.setForeground(QColor(colors["text"]))
+        
+        # 成员列表中自己的高亮背景
+        self._self_member_brush = QBrush(QColor(colors["primary"]).darker(180))
     
     def init_ui(self):
         """初始化UI"""
@@ -182,12 +303,16 @@ class ChatRoomWindow(QMainWindow):
         self.chat_display.setWordWrapMode(QTextOption.WrapAtWordBoundaryOrAnywhere)
         
         # 设置字体和tab停止距离
-        chat_font = QFont(config.THEME["fonts"]["default"], config.THEME["fonts"]["size_normal"])
-        self.chat_display.setFont(chat_font)
+        self.chat_display.setFont(get_font(config.THEME["fonts"]["size_normal"]))
         self.chat_display.setTabStopDistance(40)  # 设置tab停止距离
         
-        # 设置文档边距
-        self.chat_display.document().setDocumentMargin(5)
+        # 设置文档边距，并限制聊天记录长度以免文档无限增长
+        document = self.chat_display.document()
+        document.setDocumentMargin(5)
+        document.setMaximumBlockCount(_MAX_CHAT_BLOCKS)
+        
+        # 追加消息专用的光标，不影响用户在显示区中的选区
+        self._end_cursor = QTextCursor(document)
         
         chat_layout.addWidget(self.chat_display)
         
@@ -200,29 +325,16 @@ class ChatRoomWindow(QMainWindow):
         self.message_input = QLineEdit()
         self.message_input.setMinimumHeight(35)
         self.message_input.setPlaceholderText("输入消息...")
-        self.message_input.returnPressed.connect(self.send_message)
+        # 限制长度，保证编码后的消息不超过WebSocket单条消息上限
+        self.message_input.setMaxLength(config.NETWORK_DEFAULTS["max_chat_length"])
+        self.message_input.returnPressed.connect(self.send_message, Qt.DirectConnection)
         input_layout.addWidget(self.message_input)
         
         # Emoji按钮
         self.emoji_button = QPushButton("😊")
         self.emoji_button.setFixedSize(40, 35)  # 宽度稍大以确保emoji完整显示
-        self.emoji_button.setStyleSheet("""
-            QPushButton {
-                font-size: 20px;
-                border: 1px solid #3d3d3d;
-                border-radius: 4px;
-                padding: 0px;
-                text-align: center;
-            }
-            QPushButton:hover {
-                background-color: #3d3d3d;
-                border: 2px solid #4a9eff;
-            }
-            QPushButton:pressed {
-                background-color: #2d2d2d;
-            }
-        """)
-        self.emoji_button.clicked.connect(self.show_emoji_dialog)
+        self.emoji_button.setObjectName("emoji_button")  # 样式见窗口样式表
+        self.emoji_button.clicked.connect(self.show_emoji_dialog, Qt.DirectConnection)
         input_layout.addWidget(self.emoji_button)
         
         # 发送按钮
@@ -230,7 +342,7 @@ class ChatRoomWindow(QMainWindow):
         self.send_button.setMinimumHeight(35)
         self.send_button.setMinimumWidth(80)
         self.send_button.setObjectName("primary_button")
-        self.send_button.clicked.connect(self.send_message)
+        self.send_button.clicked.connect(self.send_message, Qt.DirectConnection)
         input_layout.addWidget(self.send_button)
         
         chat_layout.addWidget(input_widget)
@@ -247,100 +359,11 @@ class ChatRoomWindow(QMainWindow):
     
     def apply_theme(self):
         """应用主题"""
-        colors = config.THEME["colors"]
-        fonts = config.THEME["fonts"]
-        
-        stylesheet = f"""
-            QMainWindow {{
-                background-color: {colors['background']};
-            }}
-            
-            QTextEdit {{
-                background-color: {colors['surface']};
-                color: {colors['text']};
-                border: 1px solid {colors['border']};
-                border-radius: 4px;
-                padding: 10px;
-                font-size: {fonts['size_normal']}px;
-                font-family: {fonts['default']};
-                line-height: 1.6;
-                selection-background-color: {colors['primary']};
-            }}
-            
-            QListWidget {{
-                background-color: {colors['surface']};
-                color: {colors['text']};
-                border: 1px solid {colors['border']};
-                border-radius: 4px;
-                padding: 5px;
-                font-size: {fonts['size_normal']}px;
-            }}
-            
-            QListWidget::item {{
-                padding: 5px;
-                border-radius: 3px;
-                margin: 2px;
-            }}
-            
-            QListWidget::item:hover {{
-                background-color: {colors['border']};
-            }}
-            
-            QLineEdit {{
-                background-color: {colors['surface']};
-                color: {colors['text']};
-                border: 1px solid {colors['border']};
-                border-radius: 4px;
-                padding: 5px 10px;
-                font-size: {fonts['size_normal']}px;
-            }}
-            
-            QLineEdit:focus {{
-                border: 2px solid {colors['primary']};
-            }}
-            
-            QPushButton {{
-                background-color: {colors['surface']};
-                color: {colors['text']};
-                border: 1px solid {colors['border']};
-                border-radius: 4px;
-                padding: 8px 15px;
-                font-size: {fonts['size_normal']}px;
-            }}
-            
-            QPushButton:hover {{
-                background-color: {colors['border']};
-            }}
-            
-            QPushButton:pressed {{
-                background-color: {colors['background']};
-            }}
-            
-            QPushButton#primary_button {{
-                background-color: {colors['primary']};
-                color: white;
-                border: none;
-                font-weight: bold;
-            }}
-            
-            QPushButton#primary_button:hover {{
-                background-color: #5aa6ff;
-            }}
-            
-            QLabel {{
-                color: {colors['text']};
-            }}
-            
-            QSplitter::handle {{
-                background-color: {colors['border']};
-                width: 2px;
-            }}
-        """
-        
-        self.setStyleSheet(stylesheet)
+        self.setStyleSheet(_STYLESHEET)
     
     def clear_messages(self):
         """清空聊天记录"""
+        self._pending_messages.clear()
         self.chat_display.clear()
     
     def add_message(self, nickname: str, message: str, is_system: bool = False):
@@ -351,47 +374,43 @@ class ChatRoomWindow(QMainWindow):
             message: 消息内容
             is_system: 是否为系统消息
         """
+        # 时间戳按到达时间记录，渲染在定时器触发时批量进行
         timestamp = datetime.now().strftime("%H:%M:%S")
+        self._pending_messages.append((timestamp, nickname, message, is_system))
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+    
+    def _flush_messages(self):
+        """将缓存的消息一次性渲染到聊天记录"""
+        if not self._pending_messages:
+            return
+        pending = self._pending_messages
+        self._pending_messages = []
         
         # 移动光标到末尾
-        cursor = self.chat_display.textCursor()
+        cursor = self._end_cursor
         cursor.movePosition(QTextCursor.End)
-        self.chat_display.setTextCursor(cursor)
-        
-        # 如果不是第一条消息，添加换行分隔
-        if not self.chat_display.document().isEmpty():
-            cursor.insertText("\n")
-        
-        if is_system or nickname == "系统":
-            # 系统消息 - 使用斜体和不同颜色
-            formatted_text = f"[{timestamp}] {message}"
-            
-            # 创建格式
-            format = QTextCharFormat()
-            format.setForeground(QColor(config.THEME["colors"]["warning"]))
-            format.setFontItalic(True)
-            
-            # 插入文本
-            cursor.insertText(formatted_text, format)
-        else:
-            # 普通消息 - 分段插入不同格式的文本
-            
-            # 时间戳
-            time_format = QTextCharFormat()
-            time_format.setForeground(QColor(config.THEME["colors"]["text_secondary"]))
-            cursor.insertText(f"[{timestamp}] ", time_format)
-            
-            # 昵称
-            nickname_format = QTextCharFormat()
-            nickname_color = config.THEME["colors"]["primary"] if nickname == self.nickname else config.THEME["colors"]["text"]
-            nickname_format.setForeground(QColor(nickname_color))
-            nickname_format.setFontWeight(700)  # 使用数值代替QFont.Bold
-            cursor.insertText(f"{nickname}: ", nickname_format)
+        document_empty = self.chat_display.document().isEmpty()
+        
+        # 合并为一次编辑，文档只重新布局一次
+        cursor.beginEditBlock()
+        for timestamp, nickname, message, is_system in pending:
+            # 如果不是第一条消息，添加换行分隔
+            if document_empty:
+                document_empty = False
+            else:
+                cursor.insertText("\n")
             
-            # 消息内容
-            message_format = QTextCharFormat()
-            message_format.setForeground(QColor(config.THEME["colors"]["text"]))
-            cursor.insertText(message, message_format)
+            if is_system or nickname == "系统":
+                # 系统消息 - 使用斜体和不同颜色
+                cursor.insertText(f"[{timestamp}] {message}", self._system_format)
+            else:
+                # 普通消息 - 分段插入不同格式的文本
+                cursor.insertText(f"[{timestamp}] ", self._time_format)
+                nickname_format = self._self_nickname_format if nickname == self.nickname else self._other_nickname_format
+                cursor.insertText(f"{nickname}: ", nickname_format)
+                cursor.insertText(message, self._message_format)
+        cursor.endEditBlock()
         
         # 确保滚动到底部
         self.chat_display.verticalScrollBar().setValue(
@@ -405,28 +424,29 @@ class ChatRoomWindow(QMainWindow):
             members: 成员列表 [{"nickname": str, "role": str}, ...]
         """
         self.members = members
-        self.member_list.clear()
         
-        for member in members:
-            nickname = member.get("nickname", "")
-            role = member.get("role", "")
+        # 整体重建期间暂停重绘和信号，结束后只重绘一次
+        member_list = self.member_list
+        member_list.setUpdatesEnabled(False)
+        member_list.blockSignals(True)
+        try:
+            member_list.clear()
             
-            # 创建列表项
-            item = QListWidgetItem()
-            
-            # 设置显示文本
-            if role == "sender":
-                display_text = f"👑 {nickname}"
-            else:
-                display_text = f"👤 {nickname}"
-            
-            item.setText(display_text)
+            # 一次性插入所有成员的显示文本
+            nicknames = [member.get("nickname", "") for member in members]
+            member_list.addItems([
+                f"👑 {nickname}" if member.get("role", "") == "sender" else f"👤 {nickname}"
+                for member, nickname in zip(members, nicknames)
+            ])
             
             # 高亮自己
-            if nickname == self.nickname:
-                item.setBackground(QColor(config.THEME["colors"]["primary"]).darker(180))
-            
-            self.member_list.addItem(item)
+            for row, nickname in enumerate(nicknames):
+                if nickname == self.nickname:
+                    member_list.item(row).setBackground(self._self_member_brush)
+        finally:
+            member_list.blockSignals(False)
+            member_list.setUpdatesEnabled(True)
+            member_list.viewport().update()
     
     def send_message(self):
         """发送消息"""
@@ -445,8 +465,11 @@ class ChatRoomWindow(QMainWindow):
     
     def show_emoji_dialog(self):
         """显示emoji选择对话框"""
-        dialog = EmojiDialog(self)
-        dialog.emoji_selected.connect(self.insert_emoji)
+        # 对话框只创建一次，关闭后保留控件供下次显示
+        if self._emoji_dialog is None:
+            self._emoji_dialog = EmojiDialog(self)
+            self._emoji_dialog.emoji_selected.connect(self.insert_emoji)
+        dialog = self._emoji_dialog
         
         # 设置对话框位置
         button_pos = self.emoji_button.mapToGlobal(self.emoji_button.rect().topLeft())
@@ -456,12 +479,8 @@ class ChatRoomWindow(QMainWindow):
     
     def insert_emoji(self, emoji):
         """插入emoji到输入框"""
-        current_text = self.message_input.text()
-        cursor_pos = self.message_input.cursorPosition()
-        
-        new_text = current_text[:cursor_pos] + emoji + current_text[cursor_pos:]
-        self.message_input.setText(new_text)
-        self.message_input.setCursorPosition(cursor_pos + len(emoji))
+        # 在光标处插入（有选中文本时替换），光标自动移到插入内容之后
+        self.message_input.insert(emoji)
         self.message_input.setFocus()
     
     def closeEvent(self, event):
@@ -479,11 +498,3 @@ class ChatRoomWindow(QMainWindow):
             event.accept()
         else:
             event.ignore()
-    
-    def center_on_screen(self):
-        """将窗口居中显示"""
-        screen = QApplication.primaryScreen()
-        screen_rect = screen.availableGeometry()
-        window_rect = self.frameGeometry()
-        window_rect.moveCenter(screen_rect.center())
-        self.move(window_rect.topLeft())
\ No newline at end of file
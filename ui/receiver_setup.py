@@ -1,24 +1,15 @@
 # ui/receiver_setup.py - 接收端设置界面
-from PySide6.QtWidgets import (
-    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
-    QPushButton, QLabel, QLineEdit, QFrame, QMessageBox, QApplication
-)
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QFont, QIntValidator
-import random
+from PySide6.QtWidgets import QLineEdit
+from PySide6.QtGui import QIntValidator
 import config
 from utils.logger import get_logger
-from utils.network_utils import NetworkUtils
+from ui.base_setup import BaseSetupWindow
 
 logger = get_logger(__name__)
 
-class ReceiverSetupWindow(QMainWindow):
+class ReceiverSetupWindow(BaseSetupWindow):
     """接收端设置界面"""
     
-    # 信号
-    setup_completed = Signal(dict)  # 设置完成信号，传递配置参数
-    back_requested = Signal()       # 返回主界面信号
-    
     def __init__(self):
         super().__init__()
         self.init_ui()
@@ -26,232 +17,81 @@ class ReceiverSetupWindow(QMainWindow):
     
     def init_ui(self):
         """初始化UI"""
-        # 窗口设置
-        self.setWindowTitle(f"{config.APP_NAME} - 接收端设置")
-        size = config.WINDOW_SIZES["receiver_setup"]
-        self.resize(size["width"], size["height"])
-        self.setMinimumSize(size["min_width"], size["min_height"])
-        
-        # 中心部件
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        
-        # 主布局
-        main_layout = QVBoxLayout(central_widget)
-        main_layout.setSpacing(20)
-        main_layout.setContentsMargins(30, 30, 30, 30)
-        
-        # 标题
-        title_label = QLabel("接收端设置")
-        title_label.setAlignment(Qt.AlignCenter)
-        title_font = QFont(config.THEME["fonts"]["default"], config.THEME["fonts"]["size_title"])
-        title_font.setBold(True)
-        title_label.setFont(title_font)
-        main_layout.addWidget(title_label)
-        
-        # 分隔线
-        separator = QFrame()
-        separator.setFrameShape(QFrame.HLine)
-        separator.setFrameShadow(QFrame.Sunken)
-        main_layout.addWidget(separator)
-        
-        # 设置表单
-        form_widget = QWidget()
-        form_layout = QGridLayout(form_widget)
-        form_layout.setSpacing(15)
-        form_layout.setColumnStretch(1, 1)
-        
-        row = 0
+        main_layout = self._init_window("接收端设置", "receiver_setup")
+        form_layout = self._create_form(main_layout)
         
         # 服务器IP地址
-        server_ip_label = QLabel("服务器IP地址:")
-        form_layout.addWidget(server_ip_label, row, 0, Qt.AlignRight)
-        
         self.server_ip_input = QLineEdit()
         self.server_ip_input.setMinimumHeight(30)
         self.server_ip_input.setPlaceholderText("输入服务器IP地址 (支持IPv4/IPv6)")
-        form_layout.addWidget(self.server_ip_input, row, 1)
-        
-        row += 1
+        self._add_form_row(form_layout, 0, "服务器IP地址:", self.server_ip_input)
         
         # 服务器端口
-        server_port_label = QLabel("服务器端口:")
-        form_layout.addWidget(server_port_label, row, 0, Qt.AlignRight)
-        
         self.server_port_input = QLineEdit()
         self.server_port_input.setText(str(config.NETWORK_DEFAULTS["websocket_port"]))
         self.server_port_input.setValidator(QIntValidator(1, 65535))
         self.server_port_input.setMinimumHeight(30)
         self.server_port_input.setPlaceholderText("1-65535")
-        form_layout.addWidget(self.server_port_input, row, 1)
-        
-        row += 1
+        self._add_form_row(form_layout, 1, "服务器端口:", self.server_port_input)
         
         # 昵称
-        nickname_label = QLabel("昵称:")
-        form_layout.addWidget(nickname_label, row, 0, Qt.AlignRight)
-        
         self.nickname_input = QLineEdit()
         self.nickname_input.setText(self.get_random_receiver_nickname())
         self.nickname_input.setMinimumHeight(30)
         self.nickname_input.setMaxLength(20)
         self.nickname_input.setPlaceholderText("输入您的昵称")
-        form_layout.addWidget(self.nickname_input, row, 1)
-        
-        row += 1
+        self._add_form_row(form_layout, 2, "昵称:", self.nickname_input)
         
         # 验证码
-        code_label = QLabel("验证码:")
-        form_layout.addWidget(code_label, row, 0, Qt.AlignRight)
-        
         self.code_input = QLineEdit()
         self.code_input.setText(config.NETWORK_DEFAULTS["verification_code"])
         self.code_input.setMinimumHeight(30)
         self.code_input.setMaxLength(6)
         self.code_input.setPlaceholderText("6位数字验证码")
-        form_layout.addWidget(self.code_input, row, 1)
-        
-        main_layout.addWidget(form_widget)
+        self._add_form_row(form_layout, 3, "验证码:", self.code_input)
         
-        # 添加弹性空间
-        main_layout.addStretch()
-        
-        # 提示信息
-        info_label = QLabel("提示：请向发送端获取服务器地址和验证码")
-        info_label.setAlignment(Qt.AlignCenter)
-        info_font = QFont(config.THEME["fonts"]["default"], config.THEME["fonts"]["size_small"])
-        info_label.setFont(info_font)
-        info_label.setStyleSheet(f"color: {config.THEME['colors']['text_secondary']};")
-        main_layout.addWidget(info_label)
-        
-        # 按钮布局
-        button_layout = QHBoxLayout()
-        button_layout.setSpacing(10)
-        
-        # 返回按钮
-        self.back_button = QPushButton("返回")
-        self.back_button.setMinimumHeight(35)
-        self.back_button.clicked.connect(self.on_back_clicked)
-        button_layout.addWidget(self.back_button)
-        
-        button_layout.addStretch()
-        
-        # 连接按钮
-        self.connect_button = QPushButton("连接")
-        self.connect_button.setMinimumHeight(35)
-        self.connect_button.setObjectName("primary_button")
-        self.connect_button.clicked.connect(self.on_connect_clicked)
-        button_layout.addWidget(self.connect_button)
-        
-        main_layout.addLayout(button_layout)
+        # 提示信息和按钮
+        self.connect_button = self._add_footer(
+            main_layout, "提示：请向发送端获取服务器地址和验证码", "连接", self.on_connect_clicked
+        )
     
     def get_random_receiver_nickname(self) -> str:
         """获取随机接收端昵称（包含稀有角色）"""
-        # 极小概率出现稀有角色
-        if random.random() < config.RARE_ROLE_PROBABILITY:
-            return random.choice(config.RARE_ROLE_NAMES)
-        return random.choice(config.ROLE_NAMES)
-    
-    def apply_theme(self):
-        """应用主题"""
-        colors = config.THEME["colors"]
-        fonts = config.THEME["fonts"]
-        
-        stylesheet = f"""
-            QMainWindow {{
-                background-color: {colors['background']};
-            }}
-            
-            QLabel {{
-                color: {colors['text']};
-                font-size: {fonts['size_normal']}px;
-            }}
-            
-            QLineEdit {{
-                background-color: {colors['surface']};
-                color: {colors['text']};
-                border: 1px solid {colors['border']};
-                border-radius: 4px;
-                padding: 5px 10px;
-                font-size: {fonts['size_normal']}px;
-            }}
-            
-            QLineEdit:focus {{
-                border: 2px solid {colors['primary']};
-            }}
-            
-            QPushButton {{
-                background-color: {colors['surface']};
-                color: {colors['text']};
-                border: 1px solid {colors['border']};
-                border-radius: 4px;
-                padding: 8px 20px;
-                font-size: {fonts['size_normal']}px;
-            }}
-            
-            QPushButton:hover {{
-                background-color: {colors['border']};
-            }}
-            
-            QPushButton:pressed {{
-                background-color: {colors['background']};
-            }}
-            
-            QPushButton#primary_button {{
-                background-color: {colors['primary']};
-                color: white;
-                border: none;
-            }}
-            
-            QPushButton#primary_button:hover {{
-                background-color: #5aa6ff;
-            }}
-            
-            QFrame {{
-                background-color: {colors['border']};
-            }}
-        """
-        
-        self.setStyleSheet(stylesheet)
+        return config.get_random_nickname()
     
     def validate_input(self) -> bool:
         """验证输入"""
+        # 网络工具（及netifaces）在首次使用时导入，导入本模块时无需加载
+        from utils.network_utils import NetworkUtils
+        
+        errors = []
+        
         # 验证服务器IP地址
         server_ip = self.server_ip_input.text().strip()
         if not server_ip:
-            QMessageBox.warning(self, "输入错误", "请输入服务器IP地址")
-            return False
-        
-        # 尝试解析主机名或IP地址
-        if not NetworkUtils.is_valid_ip(server_ip):
+            errors.append("请输入服务器IP地址")
+        elif not NetworkUtils.is_valid_ip(server_ip):
             # 可能是域名，尝试解析
             resolved_ip = NetworkUtils.resolve_hostname(server_ip)
             if not resolved_ip:
-                QMessageBox.warning(self, "输入错误", "无效的服务器地址")
-                return False
+                errors.append("无效的服务器地址")
         
-        # 验证端口
-        try:
-            port = int(self.server_port_input.text())
-            if not (1 <= port <= 65535):
-                raise ValueError("端口无效")
-        except ValueError:
-            QMessageBox.warning(self, "输入错误", "请输入有效的端口号(1-65535)")
-            return False
+        # 验证端口（范围已由QIntValidator检查）
+        if not self.server_port_input.hasAcceptableInput():
+            errors.append("请输入有效的端口号(1-65535)")
         
         # 验证昵称
         nickname = self.nickname_input.text().strip()
         if not nickname:
-            QMessageBox.warning(self, "输入错误", "请输入昵称")
-            return False
+            errors.append("请输入昵称")
         
         # 验证验证码
         code = self.code_input.text().strip()
         if not code or len(code) != 6 or not code.isdigit():
-            QMessageBox.warning(self, "输入错误", "请输入6位数字验证码")
-            return False
+            errors.append("请输入6位数字验证码")
         
-        return True
+        # 一次性显示所有错误
+        return self._show_errors(errors)
     
     def on_connect_clicked(self):
         """连接按钮点击事件"""
@@ -270,15 +110,3 @@ class ReceiverSetupWindow(QMainWindow):
         
         # 发送设置完成信号
         self.setup_completed.emit(config_params)
-    
-    def on_back_clicked(self):
-        """返回按钮点击事件"""
-        self.back_requested.emit()
-    
-    def center_on_screen(self):
-        """将窗口居中显示"""
-        screen = QApplication.primaryScreen()
-        screen_rect = screen.availableGeometry()
-        window_rect = self.frameGeometry()
-        window_rect.moveCenter(screen_rect.center())
-        self.move(window_rect.topLeft())
\ No newline at end of file
@@ -0,0 +1,79 @@
+# ui/theme.py - 全局主题
+from functools import lru_cache
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QFont
+import config
+
+# 各窗口共用的样式表（设置到QApplication上，整个进程只解析一次；窗口只保留各自的差异部分）
+_colors = config.THEME["colors"]
+_fonts = config.THEME["fonts"]
+GLOBAL_STYLESHEET = f"""
+    QMainWindow {{
+        background-color: {_colors['background']};
+    }}
+    
+    QLabel {{
+        color: {_colors['text']};
+    }}
+    
+    QLineEdit {{
+        background-color: {_colors['surface']};
+        color: {_colors['text']};
+        border: 1px solid {_colors['border']};
+        border-radius: 4px;
+        padding: 5px 10px;
+        font-size: {_fonts['size_normal']}px;
+    }}
+    
+    QLineEdit:focus {{
+        border: 2px solid {_colors['primary']};
+    }}
+    
+    QPushButton {{
+        background-color: {_colors['surface']};
+        color: {_colors['text']};
+        border: 1px solid {_colors['border']};
+        border-radius: 4px;
+        padding: 8px 20px;
+    }}
+    
+    QPushButton:hover {{
+        background-color: {_colors['border']};
+    }}
+    
+    QPushButton:pressed {{
+        background-color: {_colors['background']};
+    }}
+    
+    QPushButton#primary_button {{
+        background-color: {_colors['primary']};
+        color: white;
+        border: none;
+    }}
+    
+    QPushButton#primary_button:hover {{
+        background-color: #5aa6ff;
+    }}
+"""
+del _colors, _fonts
+
+def apply_global_theme(app: QApplication):
+    """
+    应用全局样式和样式表（程序启动时调用一次，窗口重新打开时无需再次设置）
+    Args:
+        app: Qt应用实例
+    """
+    app.setStyle(config.THEME["style"])
+    app.setStyleSheet(GLOBAL_STYLESHEET)
+
+@lru_cache(maxsize=None)
+def get_font(size: int, bold: bool = False) -> QFont:
+    """
+    获取主题字体（按字号和粗细缓存，各窗口共用；setFont会复制字体，共用对象不会被修改）
+    Args:
+        size: 字号
+        bold: 是否加粗
+    """
+    font = QFont(config.THEME["fonts"]["default"], size)
+    font.setBold(bold)
+    return font
@@ -0,0 +1,13 @@
+# ui/window_utils.py - 窗口工具函数
+from PySide6.QtWidgets import QApplication, QWidget
+
+def center_on_screen(window: QWidget):
+    """
+    将窗口居中显示在主屏幕上
+    Args:
+        window: 要居中的窗口
+    """
+    screen_rect = QApplication.primaryScreen().availableGeometry()
+    window_rect = window.frameGeometry()
+    window_rect.moveCenter(screen_rect.center())
+    window.move(window_rect.topLeft())
@@ -1,20 +1,35 @@
 # utils/__init__.py - 工具模块包
 """
 工具类模块
-包含日志、网络工具和进程管理等通用功能
+包含日志、网络工具、进程管理和JSON编解码等通用功能
 """
 
-from .logger import LoggerManager, get_logger, get_ffmpeg_logger
-from .network_utils import NetworkUtils
-from .process_manager import ProcessManager, get_process_manager
+import importlib
 
-__all__ = [
-    'LoggerManager',
-    'get_logger',
-    'get_ffmpeg_logger',
-    'NetworkUtils',
-    'ProcessManager',
-    'get_process_manager'
-]
+# 子模块在首次访问对应名称时才导入（PEP 562），导入其中一个子模块不会连带加载其余子模块
+# 导出名称 -> 所在子模块（None表示同名子模块本身）
+_EXPORTS = {
+    'LoggerManager':       '.logger',
+    'get_logger':          '.logger',
+    'get_ffmpeg_logger':   '.logger',
+    'NetworkUtils':        '.network_utils',
+    'ProcessManager':      '.process_manager',
+    'get_process_manager': '.process_manager',
+    'json_codec':          None
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    """首次访问导出名称时导入对应的子模块"""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name = _EXPORTS[name]
+    if module_name is None:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
 
 __version__ = '1.0.0'
\ No newline at end of file
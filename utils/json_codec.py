@@ -0,0 +1,41 @@
+# utils/json_codec.py - JSON编解码
+"""
+WebSocket消息使用的JSON编解码
+优先使用orjson（C扩展，可直接解析bytes），未安装时回退到标准库json
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+# orjson.JSONDecodeError 是 json.JSONDecodeError 的子类，统一按标准库类型捕获
+JSONDecodeError = json.JSONDecodeError
+
+if orjson is not None:
+    def dumps_bytes(data: Any) -> bytes:
+        """序列化为UTF-8编码的bytes"""
+        return orjson.dumps(data)
+
+    def dumps(data: Any) -> str:
+        """序列化为字符串（非ASCII字符不转义）"""
+        return orjson.dumps(data).decode()
+
+    def loads(message: Union[str, bytes]) -> Any:
+        """反序列化，支持str和bytes"""
+        return orjson.loads(message)
+else:
+    def dumps_bytes(data: Any) -> bytes:
+        """序列化为UTF-8编码的bytes"""
+        return json.dumps(data, ensure_ascii=False).encode()
+
+    def dumps(data: Any) -> str:
+        """序列化为字符串（非ASCII字符不转义）"""
+        return json.dumps(data, ensure_ascii=False)
+
+    def loads(message: Union[str, bytes]) -> Any:
+        """反序列化，支持str和bytes"""
+        return json.loads(message)
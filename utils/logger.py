@@ -1,18 +1,144 @@
 # utils/logger.py - 日志管理器
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
 import sys
-from datetime import datetime
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, List, Optional
 import config
 
+class BufferedFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    带写缓冲的文件处理器：普通记录只写入缓冲区，错误记录立即刷新，其余由定时刷新或关闭时写出
+    文件以追加方式打开，创建时轮转一次，运行期间超过max_bytes时再轮转
+    """
+    
+    def __init__(self, filename, buffer_size: int, max_bytes: int = 0, backup_count: int = 0,
+                 encoding: Optional[str] = None):
+        self.buffer_size = buffer_size
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding, delay=True)
+        # 上次运行留下的日志移到备份文件
+        if backup_count and os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            self.doRollover()
+    
+    def _open(self):
+        return open(
+            self.baseFilename, self.mode,
+            buffering=self.buffer_size,
+            encoding=self.encoding,
+            errors=getattr(self, "errors", None)
+        )
+    
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            # 取二进制缓冲层的位置，不会刷新缓冲区（文本层尚未交给它的几KB不计入，对大小限制无影响）
+            if self.maxBytes > 0 and self.stream.buffer.tell() >= self.maxBytes:
+                self.doRollover()
+            elif record.levelno >= logging.ERROR:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+class BatchingHandler(logging.Handler):
+    """把同一级别的连续日志合并为一条多行记录再交给目标处理器，减少格式化和写入次数（合并记录使用第一行的时间）"""
+    
+    def __init__(self, target: logging.Handler, max_lines: int, max_delay: float):
+        super().__init__()
+        self.target = target
+        self.max_lines = max_lines
+        self.max_delay = max_delay
+        self._first: Optional[logging.LogRecord] = None
+        self._lines: List[str] = []
+        self._since = 0.0
+    
+    def emit(self, record):
+        # 级别不同的记录不合并
+        if self._first is not None and self._first.levelno != record.levelno:
+            self._emit_batch()
+        if self._first is None:
+            self._first = record
+            self._since = time.monotonic()
+        self._lines.append(record.getMessage())
+        if len(self._lines) >= self.max_lines:
+            self._emit_batch()
+    
+    def _emit_batch(self):
+        """把已合并的行作为一条记录交给目标处理器（持有锁时调用）"""
+        record = self._first
+        if record is None:
+            return
+        record.msg = "\n".join(self._lines)
+        record.args = None
+        self._first = None
+        self._lines = []
+        self.target.handle(record)
+    
+    def flush_stale(self):
+        """写出等待超过max_delay的合并记录"""
+        with self.lock:
+            if self._first is not None and time.monotonic() - self._since >= self.max_delay:
+                self._emit_batch()
+    
+    def flush(self):
+        with self.lock:
+            self._emit_batch()
+        self.target.flush()
+    
+    def close(self):
+        self.flush()
+        self.target.close()
+        super().close()
+
+class _RoutingHandler(logging.Handler):
+    """按日志器名称把记录转交给对应的处理器（多个FFmpeg日志器共用一个后台写入线程）"""
+    
+    def __init__(self):
+        super().__init__()
+        self._routes: Dict[str, logging.Handler] = {}
+    
+    def add_route(self, logger_name: str, handler: logging.Handler):
+        """登记日志器对应的处理器"""
+        self._routes[logger_name] = handler
+    
+    def emit(self, record):
+        handler = self._routes.get(record.name)
+        if handler is not None:
+            handler.handle(record)
+    
+    def close(self):
+        for handler in self._routes.values():
+            handler.close()
+        self._routes.clear()
+        super().close()
+
 class LoggerManager:
     """统一的日志管理器"""
     
     _loggers = {}
     _initialized = False
     
+    # 日志在调用线程中只放入队列，文件和控制台写入由后台监听线程完成
+    _listener: Optional[logging.handlers.QueueListener] = None
+    _queue_handler: Optional[logging.handlers.QueueHandler] = None
+    _target_handlers: List[logging.Handler] = []
+    
+    # FFmpeg进程日志共用一个队列和监听线程，按日志器名称分发到各自的文件
+    _ffmpeg_listener: Optional[logging.handlers.QueueListener] = None
+    _ffmpeg_queue_handler: Optional[logging.handlers.QueueHandler] = None
+    _ffmpeg_router: Optional[_RoutingHandler] = None
+    _ffmpeg_handlers: List[BatchingHandler] = []
+    _ffmpeg_flush_stop: Optional[threading.Event] = None
+    _ffmpeg_flush_thread: Optional[threading.Thread] = None
+    _atexit_registered = False
+    
     @classmethod
     def setup(cls):
         """初始化日志系统"""
@@ -23,6 +149,14 @@ class LoggerManager:
         log_dir = Path("logs")
         log_dir.mkdir(exist_ok=True)
         
+        # 日志格式中未使用线程/进程字段，跳过采集
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+        
+        # 主日志和控制台共用一个格式化器
+        formatter = cls._get_formatter()
+        
         # 设置根日志器
         root_logger = logging.getLogger()
         root_logger.setLevel(getattr(logging, config.LOGGING["level"]))
@@ -38,13 +172,26 @@ class LoggerManager:
             backupCount=config.LOGGING["backup_count"],
             encoding=config.LOGGING["encoding"]
         )
-        file_handler.setFormatter(cls._get_formatter())
-        root_logger.addHandler(file_handler)
+        file_handler.setFormatter(formatter)
         
         # 控制台处理器
         console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setFormatter(cls._get_formatter())
-        root_logger.addHandler(console_handler)
+        console_handler.setFormatter(formatter)
+        
+        # 根日志器只挂队列处理器，磁盘和控制台I/O移到后台线程
+        log_queue = queue.SimpleQueue()
+        cls._queue_handler = logging.handlers.QueueHandler(log_queue)
+        root_logger.addHandler(cls._queue_handler)
+        cls._target_handlers = [file_handler, console_handler]
+        cls._listener = logging.handlers.QueueListener(
+            log_queue, *cls._target_handlers, respect_handler_level=True
+        )
+        cls._listener.start()
+        
+        # 未经cleanup退出时也要写完队列中剩余的日志
+        if not cls._atexit_registered:
+            atexit.register(cls._stop_listeners)
+            cls._atexit_registered = True
         
         cls._initialized = True
     
@@ -74,20 +221,35 @@ class LoggerManager:
             log_dir = Path("logs") / "ffmpeg"
             log_dir.mkdir(parents=True, exist_ok=True)
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            log_file = log_dir / f"{process_name}_{timestamp}.log"
+            # 按进程名称使用固定的日志文件（日志器按名称缓存，进程重启时继续写入同一文件）
+            log_file = log_dir / f"{process_name}.log"
             
-            file_handler = logging.FileHandler(
+            # FFmpeg输出量大，先写入缓冲区，减少write系统调用
+            file_handler = BufferedFileHandler(
                 log_file,
+                buffer_size=config.LOGGING["ffmpeg_buffer_size"],
+                max_bytes=config.LOGGING["max_bytes"],
+                backup_count=config.LOGGING["ffmpeg_backup_count"],
                 encoding=config.LOGGING["encoding"]
             )
             file_handler.setFormatter(cls._get_formatter(detailed=True))
             file_handler.setLevel(logging.DEBUG)  # 文件记录所有级别
             
+            # FFmpeg短时间内会输出大量行，合并为多行记录后再格式化写入
+            batching_handler = BatchingHandler(
+                file_handler,
+                max_lines=config.LOGGING["ffmpeg_batch_lines"],
+                max_delay=config.LOGGING["ffmpeg_batch_delay"]
+            )
+            
+            # 文件写入交给FFmpeg日志的后台线程，读取进程输出的线程只负责入队
+            cls._get_ffmpeg_router().add_route(logger_name, batching_handler)
+            cls._ffmpeg_handlers.append(batching_handler)
+            
             # 设置不向上传播，避免重复记录
             logger.propagate = False
             logger.setLevel(logging.DEBUG)
-            logger.addHandler(file_handler)
+            logger.addHandler(cls._ffmpeg_queue_handler)
             
             # 不再添加控制台输出handler，只输出到文件
             
@@ -96,8 +258,70 @@ class LoggerManager:
         return cls._loggers[logger_name]
     
     @classmethod
-    def _get_formatter(cls, detailed=False):
-        """获取日志格式化器"""
+    def _get_ffmpeg_router(cls) -> _RoutingHandler:
+        """获取FFmpeg日志分发处理器，首次使用时启动FFmpeg日志的后台写入线程"""
+        if cls._ffmpeg_router is None:
+            ffmpeg_queue = queue.SimpleQueue()
+            cls._ffmpeg_queue_handler = logging.handlers.QueueHandler(ffmpeg_queue)
+            cls._ffmpeg_router = _RoutingHandler()
+            cls._ffmpeg_listener = logging.handlers.QueueListener(ffmpeg_queue, cls._ffmpeg_router)
+            cls._ffmpeg_listener.start()
+            
+            # 定时写出合并中的记录，并把缓冲区中的FFmpeg日志写入文件
+            cls._ffmpeg_flush_stop = threading.Event()
+            cls._ffmpeg_flush_thread = threading.Thread(
+                target=cls._flush_ffmpeg_logs,
+                args=(cls._ffmpeg_flush_stop,),
+                name="ffmpeg-log-flush",
+                daemon=True
+            )
+            cls._ffmpeg_flush_thread.start()
+        return cls._ffmpeg_router
+    
+    @classmethod
+    def _flush_ffmpeg_logs(cls, stop_event: threading.Event):
+        """定时写出合并中的记录并刷新FFmpeg日志缓冲区（在刷新线程中运行）"""
+        delay = config.LOGGING["ffmpeg_batch_delay"]
+        flush_ticks = max(1, round(config.LOGGING["ffmpeg_flush_interval"] / delay))
+        ticks = 0
+        while not stop_event.wait(delay):
+            ticks += 1
+            flush_files = ticks % flush_ticks == 0
+            for handler in list(cls._ffmpeg_handlers):
+                if flush_files:
+                    handler.flush()
+                else:
+                    handler.flush_stale()
+    
+    @classmethod
+    def _stop_listeners(cls):
+        """停止后台写入线程（先写完队列中剩余的日志）"""
+        if cls._ffmpeg_listener is not None:
+            cls._ffmpeg_listener.stop()
+            cls._ffmpeg_listener = None
+            cls._ffmpeg_flush_stop.set()
+            cls._ffmpeg_flush_thread.join()
+            cls._ffmpeg_flush_thread = None
+            # 关闭处理器时写出合并中的记录和缓冲区中剩余的日志
+            cls._ffmpeg_router.close()
+            cls._ffmpeg_handlers.clear()
+            cls._ffmpeg_router = None
+            cls._ffmpeg_queue_handler = None
+        
+        if cls._listener is not None:
+            cls._listener.stop()
+            cls._listener = None
+            # 之后的日志（如退出前的最后几条）直接由原处理器写入
+            root_logger = logging.getLogger()
+            root_logger.removeHandler(cls._queue_handler)
+            cls._queue_handler = None
+            for handler in cls._target_handlers:
+                root_logger.addHandler(handler)
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_formatter(detailed=False):
+        """获取日志格式化器（每种格式只创建一个，各处理器共用）"""
         if detailed:
             # 详细格式（用于FFmpeg等进程日志）
             format_str = "%(asctime)s.%(msecs)03d - [%(levelname)s] - %(message)s"
@@ -113,6 +337,8 @@ class LoggerManager:
     @classmethod
     def cleanup(cls):
         """清理日志系统"""
+        cls._stop_listeners()
+        
         for logger in cls._loggers.values():
             for handler in logger.handlers[:]:
                 handler.close()
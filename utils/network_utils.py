@@ -1,22 +1,118 @@
 # utils/network_utils.py - 网络工具
 import socket
 import ipaddress
-import netifaces
 import platform
+import re
+import threading
+import time
+from functools import lru_cache
+import netifaces
 from typing import List, Tuple, Optional
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Windows下直接调用GetAdaptersAddresses并跳过不需要的信息，比netifaces快得多
+if platform.system() == 'Windows':
+    from utils import win_ifaces
+else:
+    win_ifaces = None
+
+# 地址解析：方括号中的IPv6地址或不含':'的主机名，后跟可选的端口
+_ADDRESS_RE = re.compile(r'(?:\[([^\]]+)\]|([^:\[\]]+))(?::(\d+))?')
+
+# 网络接口地址缓存（接口在运行期间基本不变，过期后重新获取）
+_IFACE_TTL = 60.0
+_iface_cache = {"ts": 0.0, "val": None}
+_iface_lock = threading.Lock()
+
+# 公网IPv6地址缓存（与接口地址缓存相同的有效期，未找到时也缓存，避免反复探测）
+_public_ipv6_cache = {"ts": 0.0, "val": None, "valid": False}
+_public_ipv6_lock = threading.Lock()
+
+@lru_cache(maxsize=256)
+def _resolve_hostname_cached(hostname: str, prefer_ipv6: bool) -> Optional[str]:
+    """解析主机名（结果在进程内缓存；解析失败时抛出socket.gaierror，不缓存失败结果）"""
+    addr_info = socket.getaddrinfo(hostname, None)
+    
+    ipv6_addrs = []
+    ipv4_addrs = []
+    
+    for info in addr_info:
+        family, _, _, _, addr = info
+        if family == socket.AF_INET6:
+            ipv6_addrs.append(addr[0])
+        elif family == socket.AF_INET:
+            ipv4_addrs.append(addr[0])
+    
+    # 根据偏好返回
+    if prefer_ipv6 and ipv6_addrs:
+        return ipv6_addrs[0]
+    elif ipv4_addrs:
+        return ipv4_addrs[0]
+    elif ipv6_addrs:
+        return ipv6_addrs[0]
+    return None
+
+@lru_cache(maxsize=1024)
+def _is_valid_ipv6(ip: str) -> bool:
+    """验证IPv6地址是否有效（使用inet_pton检查，结果缓存）"""
+    try:
+        # 去掉可能的范围标识符
+        socket.inet_pton(socket.AF_INET6, ip.split('%')[0])
+        return True
+    except (OSError, ValueError):
+        return False
+
+@lru_cache(maxsize=1024)
+def _is_valid_ipv4(ip: str) -> bool:
+    """验证IPv4地址是否有效（使用inet_pton检查，结果缓存）"""
+    try:
+        socket.inet_pton(socket.AF_INET, ip)
+        return True
+    except (OSError, ValueError):
+        return False
+
+def _is_valid_ip(ip: str) -> bool:
+    """验证IP地址是否有效（IPv4或IPv6，按是否包含':'只验证一种）"""
+    return _is_valid_ipv6(ip) if ':' in ip else _is_valid_ipv4(ip)
+
+def _format_ipv6_for_url(ip: str) -> str:
+    """
+    格式化IPv6地址用于URL
+    IPv6地址在URL中需要用方括号包围
+    """
+    if _is_valid_ipv6(ip):
+        # 去掉可能的方括号，然后重新添加
+        ip = ip.strip('[]')
+        return f"[{ip}]"
+    return ip
+
 class NetworkUtils:
     """网络工具类"""
     
     @staticmethod
     def get_all_ip_addresses() -> List[Tuple[str, str]]:
         """
-        获取所有网络接口的IP地址
+        获取所有网络接口的IP地址（结果缓存_IFACE_TTL秒）
         返回: [(ip_address, interface_name), ...]
         """
+        with _iface_lock:
+            if _iface_cache["val"] is None or time.monotonic() - _iface_cache["ts"] >= _IFACE_TTL:
+                _iface_cache["val"] = NetworkUtils._scan_ip_addresses()
+                _iface_cache["ts"] = time.monotonic()
+            # 返回副本，调用方修改列表不影响缓存
+            return list(_iface_cache["val"])
+    
+    @staticmethod
+    def _scan_ip_addresses() -> List[Tuple[str, str]]:
+        """遍历网络接口获取IP地址"""
+        if win_ifaces is not None:
+            try:
+                return NetworkUtils._scan_windows_adapters()
+            except Exception as e:
+                logger.debug(f"调用GetAdaptersAddresses失败，改用netifaces: {e}")
+        
         ip_list = []
         
         try:
@@ -38,7 +134,7 @@ class NetworkUtils:
                     if netifaces.AF_INET6 in addrs:
                         for addr_info in addrs[netifaces.AF_INET6]:
                             ip = addr_info.get('addr', '').split('%')[0]  # 去掉范围标识符
-                            if ip and NetworkUtils.is_valid_ipv6(ip):
+                            if ip and _is_valid_ipv6(ip):
                                 # 过滤本地链路地址
                                 if not ip.startswith('fe80:'):
                                     ip_list.append((ip, f"{interface} (IPv6)"))
@@ -51,9 +147,41 @@ class NetworkUtils:
         
         return ip_list
     
+    @staticmethod
+    def _scan_windows_adapters() -> List[Tuple[str, str]]:
+        """通过GetAdaptersAddresses获取IP地址（仅Windows，过滤规则与netifaces相同）"""
+        ip_list = []
+        for interface, family, ip in win_ifaces.get_adapter_addresses():
+            if family == socket.AF_INET:
+                if not ip.startswith('127.'):
+                    ip_list.append((ip, f"{interface} (IPv4)"))
+            elif not ip.startswith('fe80:'):
+                ip_list.append((ip, f"{interface} (IPv6)"))
+        return ip_list
+    
     @staticmethod
     def get_public_ipv6() -> Optional[str]:
-        """获取公网IPv6地址"""
+        """获取公网IPv6地址（结果缓存_IFACE_TTL秒）"""
+        with _public_ipv6_lock:
+            if not _public_ipv6_cache["valid"] or time.monotonic() - _public_ipv6_cache["ts"] >= _IFACE_TTL:
+                _public_ipv6_cache["val"] = NetworkUtils._find_public_ipv6()
+                _public_ipv6_cache["ts"] = time.monotonic()
+                _public_ipv6_cache["valid"] = True
+            return _public_ipv6_cache["val"]
+    
+    @staticmethod
+    def _find_public_ipv6() -> Optional[str]:
+        """先从已缓存的接口地址中查找公网IPv6，找不到时再通过UDP连接探测"""
+        for ip, _ in NetworkUtils.get_all_ip_addresses():
+            if ':' not in ip:
+                continue
+            try:
+                addr = ipaddress.IPv6Address(ip)
+            except ValueError:
+                continue
+            if not addr.is_private and not addr.is_link_local and not addr.is_loopback:
+                return ip
+        
         try:
             # 尝试连接到IPv6 DNS服务器来获取本机IPv6
             s = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
@@ -71,14 +199,15 @@ class NetworkUtils:
         return None
     
     @staticmethod
-    def get_local_ip(prefer_ipv6=True) -> str:
+    def get_local_ip(prefer_ipv6=True, prefer_public: bool = False) -> str:
         """
         获取本机IP地址
         Args:
             prefer_ipv6: 是否优先返回IPv6地址
+            prefer_public: 是否优先返回公网IPv6地址（可能需要探测，只用于显示或拼接URL时无需开启）
         """
         # 尝试获取公网IPv6
-        if prefer_ipv6:
+        if prefer_ipv6 and prefer_public:
             ipv6 = NetworkUtils.get_public_ipv6()
             if ipv6:
                 return ipv6
@@ -106,42 +235,11 @@ class NetworkUtils:
         else:
             return "127.0.0.1"
     
-    @staticmethod
-    def is_valid_ipv6(ip: str) -> bool:
-        """验证IPv6地址是否有效"""
-        try:
-            # 去掉可能的范围标识符
-            ip = ip.split('%')[0]
-            ipaddress.IPv6Address(ip)
-            return True
-        except (ipaddress.AddressValueError, ValueError):
-            return False
-    
-    @staticmethod
-    def is_valid_ipv4(ip: str) -> bool:
-        """验证IPv4地址是否有效"""
-        try:
-            ipaddress.IPv4Address(ip)
-            return True
-        except (ipaddress.AddressValueError, ValueError):
-            return False
-    
-    @staticmethod
-    def is_valid_ip(ip: str) -> bool:
-        """验证IP地址是否有效（IPv4或IPv6）"""
-        return NetworkUtils.is_valid_ipv4(ip) or NetworkUtils.is_valid_ipv6(ip)
-    
-    @staticmethod
-    def format_ipv6_for_url(ip: str) -> str:
-        """
-        格式化IPv6地址用于URL
-        IPv6地址在URL中需要用方括号包围
-        """
-        if NetworkUtils.is_valid_ipv6(ip):
-            # 去掉可能的方括号，然后重新添加
-            ip = ip.strip('[]')
-            return f"[{ip}]"
-        return ip
+    # 地址验证和格式化为模块级函数（模块内直接调用，省去类属性查找），类中保留原有的调用方式
+    is_valid_ipv6 = staticmethod(_is_valid_ipv6)
+    is_valid_ipv4 = staticmethod(_is_valid_ipv4)
+    is_valid_ip = staticmethod(_is_valid_ip)
+    format_ipv6_for_url = staticmethod(_format_ipv6_for_url)
     
     @staticmethod
     def parse_address(address: str) -> Tuple[str, Optional[int]]:
@@ -152,30 +250,14 @@ class NetworkUtils:
             "192.168.1.1:8080" -> ("192.168.1.1", 8080)
             "[::1]:8080" -> ("::1", 8080)
             "example.com:80" -> ("example.com", 80)
+            "2001:db8::1" -> ("2001:db8::1", None)
         """
-        # IPv6格式 [ip]:port
-        if address.startswith('['):
-            try:
-                ip_end = address.index(']')
-                ip = address[1:ip_end]
-                if ip_end + 1 < len(address) and address[ip_end + 1] == ':':
-                    port = int(address[ip_end + 2:])
-                    return ip, port
-                return ip, None
-            except (ValueError, IndexError):
-                pass
-        
-        # IPv4格式或域名 ip:port
-        if ':' in address:
-            parts = address.rsplit(':', 1)
-            if len(parts) == 2:
-                try:
-                    port = int(parts[1])
-                    return parts[0], port
-                except ValueError:
-                    pass
-        
-        return address, None
+        # [IPv6]、[IPv6]:port、host、host:port；不带方括号的IPv6地址及其他格式原样返回
+        m = _ADDRESS_RE.fullmatch(address)
+        if m is None:
+            return address, None
+        port = m.group(3)
+        return m.group(1) or m.group(2), int(port) if port else None
     
     @staticmethod
     def find_available_port(start_port: int, max_attempts: int = 100) -> Optional[int]:
@@ -187,12 +269,45 @@ class NetworkUtils:
         Returns:
             可用端口号，如果没找到返回None
         """
-        for i in range(max_attempts):
-            port = start_port + i
-            if NetworkUtils.is_port_available(port):
+        # IPv4和IPv6各只创建一个socket逐个端口尝试绑定：绑定失败的socket仍可继续绑定下一个端口，
+        # 只有IPv4已绑定而IPv6失败时才需要重新创建IPv4 socket
+        try:
+            s4 = NetworkUtils._new_probe_socket(socket.AF_INET)
+        except OSError as e:
+            logger.error(f"创建端口探测socket失败: {e}")
+            return None
+        s6 = None
+        try:
+            s6 = NetworkUtils._new_probe_socket(socket.AF_INET6)
+            for port in range(start_port, start_port + max_attempts):
+                try:
+                    s4.bind(('0.0.0.0', port))
+                except OSError:
+                    continue
+                try:
+                    s6.bind(('::', port))
+                except OSError:
+                    s4.close()
+                    s4 = NetworkUtils._new_probe_socket(socket.AF_INET)
+                    continue
                 return port
+        except OSError as e:
+            logger.error(f"查找可用端口失败: {e}")
+        finally:
+            s4.close()
+            if s6 is not None:
+                s6.close()
         return None
     
+    @staticmethod
+    def _new_probe_socket(family: int) -> socket.socket:
+        """创建用于检查端口占用的socket（与is_port_available相同的选项）"""
+        s = socket.socket(family, socket.SOCK_STREAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if family == socket.AF_INET6:
+            s.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 1)
+        return s
+    
     @staticmethod
     def is_port_available(port: int, host: str = '') -> bool:
         """
@@ -223,33 +338,13 @@ class NetworkUtils:
     @staticmethod
     def resolve_hostname(hostname: str, prefer_ipv6: bool = True) -> Optional[str]:
         """
-        解析主机名到IP地址
+        解析主机名到IP地址（成功的解析结果在进程内缓存）
         Args:
             hostname: 主机名
             prefer_ipv6: 是否优先返回IPv6地址
         """
         try:
-            # 获取所有地址信息
-            addr_info = socket.getaddrinfo(hostname, None)
-            
-            ipv6_addrs = []
-            ipv4_addrs = []
-            
-            for info in addr_info:
-                family, _, _, _, addr = info
-                if family == socket.AF_INET6:
-                    ipv6_addrs.append(addr[0])
-                elif family == socket.AF_INET:
-                    ipv4_addrs.append(addr[0])
-            
-            # 根据偏好返回
-            if prefer_ipv6 and ipv6_addrs:
-                return ipv6_addrs[0]
-            elif ipv4_addrs:
-                return ipv4_addrs[0]
-            elif ipv6_addrs:
-                return ipv6_addrs[0]
-        
+            return _resolve_hostname_cached(hostname, prefer_ipv6)
         except socket.gaierror as e:
             logger.error(f"解析主机名 {hostname} 失败: {e}")
         
@@ -273,24 +368,24 @@ class NetworkUtils:
                 
                 if family == socket.AF_INET6:
                     # 处理IPv6地址格式
-                    if NetworkUtils.is_valid_ipv6(host):
+                    if _is_valid_ipv6(host):
                         connect_addr = (host, port, 0, 0)
                     else:
                         # 尝试解析为IPv6
                         resolved = NetworkUtils.resolve_hostname(host, prefer_ipv6=True)
-                        if resolved and NetworkUtils.is_valid_ipv6(resolved):
+                        if resolved and _is_valid_ipv6(resolved):
                             connect_addr = (resolved, port, 0, 0)
                         else:
                             sock.close()
                             continue
                 else:
                     # IPv4地址
-                    if NetworkUtils.is_valid_ipv4(host):
+                    if _is_valid_ipv4(host):
                         connect_addr = (host, port)
                     else:
                         # 尝试解析为IPv4
                         resolved = NetworkUtils.resolve_hostname(host, prefer_ipv6=False)
-                        if resolved and NetworkUtils.is_valid_ipv4(resolved):
+                        if resolved and _is_valid_ipv4(resolved):
                             connect_addr = (resolved, port)
                         else:
                             sock.close()
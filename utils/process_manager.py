@@ -1,16 +1,199 @@
 # utils/process_manager.py - 进程管理器
+import os
 import subprocess
 import psutil
 import platform
+import selectors
 import signal
 import time
 import threading
-from typing import Optional, List, Dict, Any
-from pathlib import Path
+from collections import deque
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Callable, Tuple
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 运行平台在导入时确定一次，启动/停止进程时不再重复判断
+_IS_WINDOWS = platform.system() == 'Windows'
+
+# 启动参数：Windows下隐藏控制台窗口并创建新进程组（Popen会复制STARTUPINFO，可以共用），POSIX下创建新会话
+if _IS_WINDOWS:
+    _STARTUP_INFO = subprocess.STARTUPINFO()
+    _STARTUP_INFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    _STARTUP_INFO.wShowWindow = subprocess.SW_HIDE
+    _CREATION_FLAGS = subprocess.CREATE_NEW_PROCESS_GROUP
+    _STOP_SIGNAL = signal.CTRL_BREAK_EVENT
+else:
+    _STARTUP_INFO = None
+    _CREATION_FLAGS = 0
+    _STOP_SIGNAL = signal.SIGTERM
+
+# Windows的匿名管道不支持select，仍为每个管道使用一个读取线程
+_USE_PIPE_REACTOR = not _IS_WINDOWS
+
+# Linux 5.3+（Python 3.9+）可通过pidfd在读取线程中等待进程退出，否则使用等待线程
+_HAS_PIDFD = hasattr(os, 'pidfd_open')
+
+# 每次从管道读取的最大字节数
+_PIPE_READ_SIZE = 65536
+
+# Linux下直接读取/proc获取进程信息，其他系统使用psutil
+_USE_PROC_FS = platform.system() == 'Linux'
+if _USE_PROC_FS:
+    _CLK_TCK = os.sysconf('SC_CLK_TCK')
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+# /proc/<pid>/stat中的状态字母，与psutil的status()取值一致
+_PROC_STATUS = {
+    'R': 'running', 'S': 'sleeping', 'D': 'disk-sleep', 'T': 'stopped',
+    't': 'tracing-stop', 'Z': 'zombie', 'X': 'dead', 'x': 'dead',
+    'K': 'wake-kill', 'W': 'waking', 'I': 'idle', 'P': 'parked'
+}
+
+# /proc/<pid>/statm各字段，与psutil在Linux上的memory_info()字段一致（单位为页）
+_STATM_FIELDS = ('vms', 'rss', 'shared', 'text', 'lib', 'data', 'dirty')
+
+@lru_cache(maxsize=None)
+def _boot_time() -> float:
+    """系统启动时间（时间戳，运行期间不变）"""
+    with open('/proc/stat', 'rb') as f:
+        for line in f:
+            if line.startswith(b'btime'):
+                return float(line.split()[1])
+    return 0.0
+
+def _split_lines(data: bytes) -> Tuple[List[bytes], bytes]:
+    """将读取到的数据分成完整的行和末尾未结束的半行"""
+    # 与文本模式一致，\r、\n和\r\n都视为换行（FFmpeg进度行以\r结尾）
+    lines = data.splitlines(keepends=True)
+    partial = lines.pop() if not lines[-1].endswith((b'\n', b'\r')) else b''
+    return lines, partial
+
+def _dispatch_line(callback: Callable[[str], None], raw: bytes, encoding: str):
+    """解码一行并调用回调"""
+    line = raw.decode(encoding, errors='replace').rstrip()
+    if line:
+        try:
+            callback(line)
+        except Exception as e:
+            logger.debug(f"处理进程输出时出错: {e}")
+
+class _PipeReader:
+    """在单个线程中通过selectors读取所有子进程的输出管道，按行调用回调，并等待pidfd报告的进程退出（仅POSIX）"""
+    
+    def __init__(self, shutdown_event: threading.Event):
+        self._shutdown_event = shutdown_event
+        self._lock = threading.Lock()
+        self._pending = deque()  # 待注册的(文件描述符, 数据)，由读取线程取出注册，选择器只在读取线程中操作
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._wakeup_r: Optional[int] = None
+        self._wakeup_w: Optional[int] = None
+    
+    def register(self, stream, callback: Callable[[str], None], on_eof: Callable[[], None]):
+        """
+        注册子进程输出管道
+        Args:
+            stream: Popen的stdout/stderr（文本模式，按其编码解码）
+            callback: 每行输出的回调（在读取线程中调用）
+            on_eof: 管道关闭（进程退出）后的回调
+        """
+        # data: [回调, 退出回调, 编码, 未结束的半行]
+        self._add(stream.fileno(), [callback, on_eof, stream.encoding or 'utf-8', b''])
+    
+    def watch_exit(self, pidfd: int, callback: Callable[[], None]):
+        """
+        注册进程的pidfd，进程退出时在读取线程中调用回调（pidfd由读取线程关闭）
+        Args:
+            pidfd: os.pidfd_open返回的文件描述符
+            callback: 进程退出后的回调
+        """
+        self._add(pidfd, callback)
+    
+    def _add(self, fd: int, data):
+        """加入待注册队列并唤醒读取线程"""
+        with self._lock:
+            if self._selector is None:
+                self._start()
+            self._pending.append((fd, data))
+        os.write(self._wakeup_w, b'\0')
+    
+    def _start(self):
+        """创建选择器并启动读取线程（持有锁时调用）"""
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        threading.Thread(target=self._run, name="pipe-reader", daemon=True).start()
+    
+    def _run(self):
+        """读取线程主循环"""
+        selector = self._selector
+        while True:
+            try:
+                for key, _ in selector.select():
+                    if key.fd == self._wakeup_r:
+                        self._register_pending()
+                    elif callable(key.data):
+                        self._exited(key)
+                    else:
+                        self._read(key)
+            except Exception as e:
+                logger.error(f"读取进程输出时出错: {e}")
+    
+    def _register_pending(self):
+        """注册新加入的管道和pidfd"""
+        try:
+            while os.read(self._wakeup_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        while self._pending:
+            fd, data = self._pending.popleft()
+            # 管道未读到结束就被关闭时，其编号可能被新管道复用，先移除旧的注册
+            try:
+                self._selector.unregister(fd)
+            except KeyError:
+                pass
+            self._selector.register(fd, selectors.EVENT_READ, data)
+    
+    def _exited(self, key: selectors.SelectorKey):
+        """pidfd可读：进程已退出，注销并关闭pidfd后调用回调"""
+        self._selector.unregister(key.fd)
+        os.close(key.fd)
+        try:
+            key.data()
+        except Exception as e:
+            logger.error(f"处理进程退出时出错: {e}")
+    
+    def _read(self, key: selectors.SelectorKey):
+        """读取一个管道中的可用数据并按行分发"""
+        callback, on_eof, encoding, partial = key.data
+        try:
+            data = os.read(key.fd, _PIPE_READ_SIZE)
+        except OSError:
+            data = b''
+        
+        if not data:
+            # 管道关闭：输出剩余的半行后注销
+            self._selector.unregister(key.fd)
+            if partial:
+                self._dispatch(callback, partial, encoding)
+            try:
+                on_eof()
+            except Exception as e:
+                logger.debug(f"管道关闭回调出错: {e}")
+            return
+        
+        lines, key.data[3] = _split_lines(partial + data)
+        for raw in lines:
+            self._dispatch(callback, raw, encoding)
+    
+    def _dispatch(self, callback: Callable[[str], None], raw: bytes, encoding: str):
+        """解码一行并调用回调（程序退出中不再分发）"""
+        if not self._shutdown_event.is_set():
+            _dispatch_line(callback, raw, encoding)
+
 class ProcessManager:
     """统一的进程管理器"""
     
@@ -19,6 +202,10 @@ class ProcessManager:
         self._threads: Dict[str, threading.Thread] = {}
         self._lock = threading.Lock()
         self._shutdown_event = threading.Event()
+        # 进程信息采样缓存：名称 -> (PID, 上次采样)，用于计算CPU占用及复用psutil对象
+        self._info_samples: Dict[str, tuple] = {}
+        # POSIX下所有输出管道及其进程退出由一个线程处理，Windows下每个管道一个读取线程
+        self._pipe_reader = _PipeReader(self._shutdown_event) if _USE_PIPE_REACTOR else None
     
     def start_process(
         self,
@@ -28,7 +215,8 @@ class ProcessManager:
         env: Optional[Dict[str, str]] = None,
         stdout_callback: Optional[callable] = None,
         stderr_callback: Optional[callable] = None,
-        restart_on_exit: bool = False
+        restart_on_exit: bool = False,
+        on_exit: Optional[Callable[[int], None]] = None
     ) -> bool:
         """
         启动进程
@@ -40,6 +228,7 @@ class ProcessManager:
             stdout_callback: 标准输出回调函数
             stderr_callback: 标准错误回调函数
             restart_on_exit: 进程退出时是否自动重启
+            on_exit: 进程自行退出时的回调，参数为退出码（在监控线程中调用，经stop_process停止时不调用）
         """
         with self._lock:
             if name in self._processes:
@@ -47,14 +236,6 @@ class ProcessManager:
                 return False
             
             try:
-                # 准备启动参数
-                startup_info = None
-                if platform.system() == 'Windows':
-                    # Windows下隐藏控制台窗口
-                    startup_info = subprocess.STARTUPINFO()
-                    startup_info.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                    startup_info.wShowWindow = subprocess.SW_HIDE
-                
                 # 启动进程
                 process = subprocess.Popen(
                     command,
@@ -63,29 +244,38 @@ class ProcessManager:
                     stdin=subprocess.DEVNULL,
                     cwd=cwd,
                     env=env,
-                    startupinfo=startup_info,
-                    creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if platform.system() == 'Windows' else 0,
-                    text=True,
-                    bufsize=1  # 行缓冲
+                    startupinfo=_STARTUP_INFO,
+                    creationflags=_CREATION_FLAGS,
+                    start_new_session=not _IS_WINDOWS,  # POSIX下子进程自成进程组，便于整组停止
+                    text=True  # 输出直接从文件描述符按块读取，不经过文本包装的缓冲
                 )
                 
                 self._processes[name] = process
                 logger.debug(f"进程 {name} 已启动 (PID: {process.pid})")
                 
-                # 启动输出监控线程
+                # 启动输出监控
                 if stdout_callback or stderr_callback:
+                    if self._pipe_reader is not None:
+                        # POSIX下由管道读取线程在输出关闭后处理进程退出，不再为每个进程创建监控线程
+                        self._watch_output(name, process, stdout_callback, stderr_callback, restart_on_exit, command, cwd, env, on_exit)
+                        return True
+                    
                     monitor_thread = threading.Thread(
                         target=self._monitor_process_output,
-                        args=(name, process, stdout_callback, stderr_callback, restart_on_exit, command, cwd, env),
+                        args=(name, process, stdout_callback, stderr_callback, restart_on_exit, command, cwd, env, on_exit),
                         daemon=True
                     )
                     monitor_thread.start()
                     self._threads[name] = monitor_thread
-                elif restart_on_exit:
-                    # 即使没有输出回调，如果需要自动重启也要监控
+                elif restart_on_exit or on_exit:
+                    # 即使没有输出回调，如果需要自动重启或退出通知也要监控
+                    if self._watch_exit(process, lambda: self._monitor_process_exit(
+                            name, process, command, cwd, env, restart_on_exit, on_exit)):
+                        return True
+                    
                     monitor_thread = threading.Thread(
                         target=self._monitor_process_exit,
-                        args=(name, process, command, cwd, env),
+                        args=(name, process, command, cwd, env, restart_on_exit, on_exit),
                         daemon=True
                     )
                     monitor_thread.start()
@@ -97,6 +287,55 @@ class ProcessManager:
                 logger.error(f"启动进程 {name} 失败: {e}")
                 return False
     
+    def _watch_output(
+        self,
+        name: str,
+        process: subprocess.Popen,
+        stdout_callback: Optional[callable],
+        stderr_callback: Optional[callable],
+        restart_on_exit: bool,
+        command: List[str],
+        cwd: Optional[str],
+        env: Optional[Dict[str, str]],
+        on_exit: Optional[Callable[[int], None]] = None
+    ):
+        """将进程输出管道注册到管道读取线程，全部管道关闭后处理进程退出（仅POSIX）"""
+        streams = [(stream, callback) for stream, callback in
+                   ((process.stdout, stdout_callback), (process.stderr, stderr_callback))
+                   if callback and stream]
+        remaining = [len(streams)]
+        
+        def on_eof():
+            # 管道关闭回调都在读取线程中调用，无需加锁
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+            args = (name, process, stdout_callback, stderr_callback, restart_on_exit, command, cwd, env, on_exit)
+            if process.poll() is None:
+                # 进程关闭了输出但仍在运行（少见），等待其退出，避免阻塞读取线程
+                if not self._watch_exit(process, lambda: self._handle_output_exit(*args)):
+                    threading.Thread(target=self._handle_output_exit, args=args, daemon=True).start()
+            else:
+                self._handle_output_exit(*args)
+        
+        for stream, callback in streams:
+            self._pipe_reader.register(stream, callback, on_eof)
+    
+    def _watch_exit(self, process: subprocess.Popen, callback: Callable[[], None]) -> bool:
+        """
+        通过pidfd在管道读取线程中等待进程退出（仅Linux）
+        Returns:
+            是否已注册，不支持pidfd时返回False，由调用方改用等待线程
+        """
+        if self._pipe_reader is None or not _HAS_PIDFD:
+            return False
+        try:
+            pidfd = os.pidfd_open(process.pid)
+        except OSError:
+            return False
+        self._pipe_reader.watch_exit(pidfd, callback)
+        return True
+    
     def _monitor_process_output(
         self,
         name: str,
@@ -106,44 +345,56 @@ class ProcessManager:
         restart_on_exit: bool,
         command: List[str],
         cwd: Optional[str],
-        env: Optional[Dict[str, str]]
+        env: Optional[Dict[str, str]],
+        on_exit: Optional[Callable[[int], None]] = None
     ):
-        """监控进程输出"""
+        """监控进程输出（Windows下使用，每个管道一个读取线程）"""
         try:
-            # 创建读取线程
-            threads = []
+            # 开始读取输出
+            read_threads = []
             
-            if stdout_callback and process.stdout:
-                stdout_thread = threading.Thread(
+            for stream, callback in ((process.stdout, stdout_callback), (process.stderr, stderr_callback)):
+                if not (callback and stream):
+                    continue
+                read_thread = threading.Thread(
                     target=self._read_stream,
-                    args=(process.stdout, stdout_callback),
+                    args=(stream, callback),
                     daemon=True
                 )
-                stdout_thread.start()
-                threads.append(stdout_thread)
-            
-            if stderr_callback and process.stderr:
-                stderr_thread = threading.Thread(
-                    target=self._read_stream,
-                    args=(process.stderr, stderr_callback),
-                    daemon=True
-                )
-                stderr_thread.start()
-                threads.append(stderr_thread)
+                read_thread.start()
+                read_threads.append(read_thread)
             
             # 等待进程结束
             process.wait()
             
-            # 等待所有读取线程结束
-            for thread in threads:
-                thread.join(timeout=1)
+            # 等待输出读取结束
+            for read_thread in read_threads:
+                read_thread.join(timeout=1)
+        
+        except Exception as e:
+            logger.error(f"监控进程 {name} 输出时出错: {e}")
+            return
+        
+        self._handle_output_exit(name, process, stdout_callback, stderr_callback, restart_on_exit, command, cwd, env, on_exit)
+    
+    def _handle_output_exit(
+        self,
+        name: str,
+        process: subprocess.Popen,
+        stdout_callback: Optional[callable],
+        stderr_callback: Optional[callable],
+        restart_on_exit: bool,
+        command: List[str],
+        cwd: Optional[str],
+        env: Optional[Dict[str, str]],
+        on_exit: Optional[Callable[[int], None]] = None
+    ):
+        """输出已读取完毕后处理进程退出"""
+        try:
+            process.wait()
             
             # 处理进程退出
-            with self._lock:
-                if name in self._processes:
-                    del self._processes[name]
-                if name in self._threads:
-                    del self._threads[name]
+            exited_itself = self._remove_exited(name, process)
             
             exit_code = process.returncode
             if exit_code != 0:
@@ -151,60 +402,104 @@ class ProcessManager:
             else:
                 logger.debug(f"进程 {name} 正常退出")
             
+            if exited_itself:
+                self._notify_exit(name, on_exit, exit_code)
+            
             # 自动重启逻辑
-            if restart_on_exit and not self._shutdown_event.is_set():
-                logger.debug(f"尝试重启进程 {name}")
-                time.sleep(3)  # 等待3秒后重启
-                if not self._shutdown_event.is_set():
-                    self.start_process(
-                        name, command, cwd, env,
-                        stdout_callback, stderr_callback,
-                        restart_on_exit
-                    )
+            if restart_on_exit:
+                self._restart_later(
+                    name, command, cwd, env,
+                    stdout_callback, stderr_callback,
+                    restart_on_exit, on_exit
+                )
         
         except Exception as e:
             logger.error(f"监控进程 {name} 输出时出错: {e}")
     
+    def _restart_later(self, name: str, *args):
+        """3秒后重启进程（在单独的线程中等待，不阻塞调用线程）"""
+        if self._shutdown_event.is_set():
+            return
+        logger.debug(f"尝试重启进程 {name}")
+        
+        def restart():
+            # 等待期间开始停止所有进程时立即放弃重启（cleanup随后会清除停止标志，不能等到3秒后再检查）
+            if not self._shutdown_event.wait(3):
+                self.start_process(name, *args)
+        
+        threading.Thread(target=restart, name=f"restart-{name}", daemon=True).start()
+    
     def _monitor_process_exit(
         self,
         name: str,
         process: subprocess.Popen,
         command: List[str],
         cwd: Optional[str],
-        env: Optional[Dict[str, str]]
+        env: Optional[Dict[str, str]],
+        restart_on_exit: bool = True,
+        on_exit: Optional[Callable[[int], None]] = None
     ):
-        """仅监控进程退出（用于自动重启）"""
+        """仅监控进程退出（用于自动重启和退出通知；经pidfd调用时进程已退出，wait立即返回）"""
         try:
             process.wait()
             
-            with self._lock:
-                if name in self._processes:
-                    del self._processes[name]
-                if name in self._threads:
-                    del self._threads[name]
+            exited_itself = self._remove_exited(name, process)
             
             exit_code = process.returncode
+            if exited_itself:
+                self._notify_exit(name, on_exit, exit_code)
+            
             if exit_code != 0:
                 logger.warning(f"进程 {name} 异常退出，退出码: {exit_code}")
                 
                 # 自动重启
-                if not self._shutdown_event.is_set():
-                    logger.debug(f"尝试重启进程 {name}")
-                    time.sleep(3)
-                    if not self._shutdown_event.is_set():
-                        self.start_process(name, command, cwd, env, None, None, True)
+                if restart_on_exit:
+                    self._restart_later(name, command, cwd, env, None, None, True, on_exit)
         
         except Exception as e:
             logger.error(f"监控进程 {name} 退出时出错: {e}")
     
+    def _remove_exited(self, name: str, process: subprocess.Popen) -> bool:
+        """
+        进程退出后移除记录
+        Returns:
+            进程是否自行退出（记录已被stop_process摘除时返回False）
+        """
+        with self._lock:
+            if self._processes.get(name) is not process:
+                return False
+            del self._processes[name]
+            self._threads.pop(name, None)
+            return True
+    
+    def _notify_exit(self, name: str, on_exit: Optional[Callable[[int], None]], exit_code: int):
+        """调用进程退出回调"""
+        if on_exit is None:
+            return
+        try:
+            on_exit(exit_code)
+        except Exception as e:
+            logger.error(f"执行进程 {name} 退出回调时出错: {e}")
+    
     def _read_stream(self, stream, callback):
-        """读取流数据"""
+        """读取流数据（Windows下使用：每次直接从管道读取一大块再按行分发，不逐行读取）"""
+        encoding = stream.encoding or 'utf-8'
+        partial = b''
         try:
-            for line in stream:
-                if self._shutdown_event.is_set():
+            fd = stream.fileno()
+            while not self._shutdown_event.is_set():
+                data = os.read(fd, _PIPE_READ_SIZE)
+                if not data:
                     break
-                if line:
-                    callback(line.rstrip())
+                lines, partial = _split_lines(partial + data)
+                for raw in lines:
+                    if self._shutdown_event.is_set():
+                        return
+                    _dispatch_line(callback, raw, encoding)
+            
+            # 管道关闭：输出剩余的半行
+            if partial and not self._shutdown_event.is_set():
+                _dispatch_line(callback, partial, encoding)
         except Exception as e:
             logger.debug(f"读取流时出错: {e}")
     
@@ -215,40 +510,35 @@ class ProcessManager:
             name: 进程名称
             timeout: 等待超时时间（秒）
         """
+        # 只在锁内摘除记录，等待进程退出放在锁外，允许多个进程并行停止
         with self._lock:
-            if name not in self._processes:
-                logger.warning(f"进程 {name} 不存在")
-                return False
-            
-            process = self._processes[name]
+            process = self._processes.pop(name, None)
+            self._threads.pop(name, None)
+        
+        if process is None:
+            logger.warning(f"进程 {name} 不存在")
+            return False
+        
+        try:
+            # 先尝试正常终止
+            process.send_signal(_STOP_SIGNAL)
             
+            # 等待进程结束
             try:
-                # 先尝试正常终止
-                if platform.system() == 'Windows':
-                    process.send_signal(signal.CTRL_BREAK_EVENT)
-                else:
-                    process.terminate()
-                
-                # 等待进程结束
-                try:
-                    process.wait(timeout=timeout)
-                    logger.debug(f"进程 {name} 已正常停止")
-                except subprocess.TimeoutExpired:
-                    # 强制终止
-                    logger.warning(f"进程 {name} 未响应，强制终止")
-                    process.kill()
-                    process.wait(timeout=2)
-                
-                # 清理记录
-                del self._processes[name]
-                if name in self._threads:
-                    del self._threads[name]
-                
-                return True
+                process.wait(timeout=timeout)
+                logger.debug(f"进程 {name} 已正常停止")
+            except subprocess.TimeoutExpired:
+                # 强制终止
+                logger.warning(f"进程 {name} 未响应，强制终止")
+                process.kill()
+                process.wait(timeout=2)
             
-            except Exception as e:
-                logger.error(f"停止进程 {name} 失败: {e}")
-                return False
+            return True
+        
+        except Exception as e:
+            logger.error(f"停止进程 {name} 失败: {e}")
+            self._restore_record(name, process)
+            return False
     
     def stop_process_tree(self, name: str, timeout: int = 5) -> bool:
         """
@@ -258,51 +548,74 @@ class ProcessManager:
             timeout: 等待超时时间（秒）
         """
         with self._lock:
-            if name not in self._processes:
-                logger.warning(f"进程 {name} 不存在")
-                return False
+            process = self._processes.pop(name, None)
+            self._threads.pop(name, None)
+        
+        if process is None:
+            logger.warning(f"进程 {name} 不存在")
+            return False
+        
+        try:
+            # 获取进程树（用于等待全部退出）
+            parent = psutil.Process(process.pid)
+            procs = [parent] + parent.children(recursive=True)
             
-            process = self._processes[name]
+            # 一次向整个进程组发送终止信号，不逐个终止子进程
+            self._signal_tree(process, force=False)
             
-            try:
-                # 获取进程树
-                parent = psutil.Process(process.pid)
-                children = parent.children(recursive=True)
-                
-                # 终止所有子进程
-                for child in children:
-                    try:
-                        child.terminate()
-                    except psutil.NoSuchProcess:
-                        pass
-                
-                # 终止父进程
-                parent.terminate()
-                
-                # 等待所有进程结束
-                gone, alive = psutil.wait_procs(
-                    [parent] + children,
-                    timeout=timeout
-                )
-                
-                # 强制杀死仍然存活的进程
+            # 等待所有进程结束
+            gone, alive = psutil.wait_procs(procs, timeout=timeout)
+            
+            if alive:
+                # 强制杀死整个进程组，再单独处理已脱离进程组的残留进程
+                logger.warning(f"进程树 {name} 未响应，强制终止")
+                self._signal_tree(process, force=True)
+                gone, alive = psutil.wait_procs(alive, timeout=2)
                 for p in alive:
                     try:
                         p.kill()
                     except psutil.NoSuchProcess:
                         pass
-                
-                # 清理记录
-                del self._processes[name]
-                if name in self._threads:
-                    del self._threads[name]
-                
-                logger.debug(f"进程树 {name} 已停止")
-                return True
             
-            except Exception as e:
-                logger.error(f"停止进程树 {name} 失败: {e}")
-                return False
+            logger.debug(f"进程树 {name} 已停止")
+            return True
+        
+        except Exception as e:
+            logger.error(f"停止进程树 {name} 失败: {e}")
+            self._restore_record(name, process)
+            return False
+    
+    @staticmethod
+    def _signal_tree(process: subprocess.Popen, force: bool):
+        """
+        向进程所在的进程组发送终止信号
+        Args:
+            process: 进程组的首进程（启动时已创建新进程组）
+            force: 是否强制杀死
+        """
+        if _IS_WINDOWS:
+            if force:
+                # 一次调用结束整个进程树
+                subprocess.run(
+                    ['taskkill', '/T', '/F', '/PID', str(process.pid)],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    creationflags=subprocess.CREATE_NO_WINDOW
+                )
+            else:
+                process.send_signal(_STOP_SIGNAL)
+            return
+        
+        try:
+            os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    
+    def _restore_record(self, name: str, process: subprocess.Popen):
+        """停止失败且进程仍存活时恢复记录，以便后续再次停止"""
+        if process.poll() is None:
+            with self._lock:
+                self._processes.setdefault(name, process)
     
     def is_process_running(self, name: str) -> bool:
         """检查进程是否在运行"""
@@ -316,13 +629,24 @@ class ProcessManager:
     def get_process_info(self, name: str) -> Optional[Dict[str, Any]]:
         """获取进程信息"""
         with self._lock:
-            if name not in self._processes:
-                return None
-            
-            process = self._processes[name]
-            
+            process = self._processes.get(name)
+        if process is None:
+            return None
+        
+        if _USE_PROC_FS:
             try:
-                p = psutil.Process(process.pid)
+                return self._read_proc_info(name, process.pid)
+            except (OSError, ValueError, IndexError):
+                return None
+        
+        try:
+            # 复用psutil对象，cpu_percent才能得到两次调用之间的占用率
+            sample = self._info_samples.get(name)
+            if sample is None or sample[0] != process.pid:
+                sample = (process.pid, psutil.Process(process.pid))
+                self._info_samples[name] = sample
+            p = sample[1]
+            with p.oneshot():
                 return {
                     'pid': process.pid,
                     'name': p.name(),
@@ -332,8 +656,42 @@ class ProcessManager:
                     'create_time': p.create_time(),
                     'num_threads': p.num_threads()
                 }
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                return None
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+    
+    def _read_proc_info(self, name: str, pid: int) -> Dict[str, Any]:
+        """从/proc/<pid>/stat和/proc/<pid>/statm读取进程信息（仅Linux）"""
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            stat = f.read()
+        with open(f'/proc/{pid}/statm', 'rb') as f:
+            statm = f.read().split()
+        now = time.monotonic()
+        
+        # 进程名可能包含空格和括号，以最后一个')'分隔
+        comm_end = stat.rindex(b')')
+        comm = stat[stat.index(b'(') + 1:comm_end].decode(errors='replace')
+        fields = stat[comm_end + 2:].split()
+        state = fields[0].decode()
+        cpu_time = (int(fields[11]) + int(fields[12])) / _CLK_TCK  # utime + stime
+        
+        # CPU占用按两次调用之间的CPU时间计算，首次调用返回0.0（与psutil一致）
+        cpu_percent = 0.0
+        sample = self._info_samples.get(name)
+        if sample is not None and sample[0] == pid:
+            last_cpu_time, last_time = sample[1]
+            if now > last_time:
+                cpu_percent = round((cpu_time - last_cpu_time) / (now - last_time) * 100, 1)
+        self._info_samples[name] = (pid, (cpu_time, now))
+        
+        return {
+            'pid': pid,
+            'name': comm,
+            'status': _PROC_STATUS.get(state, state),
+            'cpu_percent': cpu_percent,
+            'memory_info': {field: int(value) * _PAGE_SIZE for field, value in zip(_STATM_FIELDS, statm)},
+            'create_time': _boot_time() + int(fields[19]) / _CLK_TCK,
+            'num_threads': int(fields[17])
+        }
     
     def get_all_processes(self) -> List[str]:
         """获取所有管理的进程名称"""
@@ -367,6 +725,7 @@ class ProcessManager:
         self.stop_all()
         self._processes.clear()
         self._threads.clear()
+        self._info_samples.clear()
         self._shutdown_event.clear()
 
 # 全局进程管理器实例
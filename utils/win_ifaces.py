@@ -0,0 +1,108 @@
+# utils/win_ifaces.py - Windows网络接口地址（直接调用GetAdaptersAddresses，仅Windows）
+import ctypes
+import socket
+from ctypes import wintypes
+from typing import List, Optional, Tuple
+
+# GetAdaptersAddresses标志：只需要单播地址，跳过任播、多播地址和DNS信息
+GAA_FLAG_SKIP_ANYCAST = 0x0002
+GAA_FLAG_SKIP_MULTICAST = 0x0004
+GAA_FLAG_SKIP_DNS_SERVER = 0x0008
+GAA_FLAG_SKIP_DNS_INFO = 0x0800
+_FLAGS = GAA_FLAG_SKIP_ANYCAST | GAA_FLAG_SKIP_MULTICAST | GAA_FLAG_SKIP_DNS_SERVER | GAA_FLAG_SKIP_DNS_INFO
+
+AF_UNSPEC = 0
+ERROR_SUCCESS = 0
+ERROR_BUFFER_OVERFLOW = 111
+ERROR_NO_DATA = 232
+
+class SOCKET_ADDRESS(ctypes.Structure):
+    _fields_ = [
+        ("lpSockaddr", ctypes.c_void_p),
+        ("iSockaddrLength", ctypes.c_int),
+    ]
+
+class IP_ADAPTER_UNICAST_ADDRESS(ctypes.Structure):
+    """IP_ADAPTER_UNICAST_ADDRESS的开头部分（结构体由系统分配，只读取用到的字段）"""
+
+IP_ADAPTER_UNICAST_ADDRESS._fields_ = [
+    ("Length", wintypes.ULONG),
+    ("Flags", wintypes.DWORD),
+    ("Next", ctypes.POINTER(IP_ADAPTER_UNICAST_ADDRESS)),
+    ("Address", SOCKET_ADDRESS),
+]
+
+class IP_ADAPTER_ADDRESSES(ctypes.Structure):
+    """IP_ADAPTER_ADDRESSES的开头部分（结构体由系统分配，只读取用到的字段）"""
+
+IP_ADAPTER_ADDRESSES._fields_ = [
+    ("Length", wintypes.ULONG),
+    ("IfIndex", wintypes.DWORD),
+    ("Next", ctypes.POINTER(IP_ADAPTER_ADDRESSES)),
+    ("AdapterName", ctypes.c_char_p),
+    ("FirstUnicastAddress", ctypes.POINTER(IP_ADAPTER_UNICAST_ADDRESS)),
+    ("FirstAnycastAddress", ctypes.c_void_p),
+    ("FirstMulticastAddress", ctypes.c_void_p),
+    ("FirstDnsServerAddress", ctypes.c_void_p),
+    ("DnsSuffix", ctypes.c_wchar_p),
+    ("Description", ctypes.c_wchar_p),
+    ("FriendlyName", ctypes.c_wchar_p),
+]
+
+_GetAdaptersAddresses = ctypes.WinDLL("iphlpapi").GetAdaptersAddresses
+_GetAdaptersAddresses.argtypes = [
+    wintypes.ULONG, wintypes.ULONG, ctypes.c_void_p,
+    ctypes.c_void_p, ctypes.POINTER(wintypes.ULONG)
+]
+_GetAdaptersAddresses.restype = wintypes.ULONG
+
+# 上次成功时的缓冲区大小（微软建议的初始值为15KB），下次直接使用，避免先探测大小再获取
+_buffer_size = 15 * 1024
+
+def _sockaddr_to_ip(address: SOCKET_ADDRESS) -> Optional[Tuple[int, str]]:
+    """把SOCKADDR转换为(地址族, IP地址)，不支持的地址族返回None"""
+    if not address.lpSockaddr:
+        return None
+    raw = ctypes.string_at(address.lpSockaddr, address.iSockaddrLength)
+    family = int.from_bytes(raw[:2], "little")
+    if family == socket.AF_INET:
+        return family, socket.inet_ntop(family, raw[4:8])
+    if family == socket.AF_INET6:
+        return family, socket.inet_ntop(family, raw[8:24])
+    return None
+
+def get_adapter_addresses() -> List[Tuple[str, int, str]]:
+    """
+    获取所有网络接口的单播地址
+    返回: [(interface_name, family, ip_address), ...]
+    """
+    global _buffer_size
+    
+    size = wintypes.ULONG(_buffer_size)
+    # 缓冲区不足时按返回的大小重试（两次调用之间可能新增了接口）
+    for _ in range(3):
+        buf = ctypes.create_string_buffer(size.value)
+        ret = _GetAdaptersAddresses(AF_UNSPEC, _FLAGS, None, buf, ctypes.byref(size))
+        if ret != ERROR_BUFFER_OVERFLOW:
+            break
+    
+    if ret == ERROR_NO_DATA:
+        return []
+    if ret != ERROR_SUCCESS:
+        raise ctypes.WinError(ret)
+    _buffer_size = len(buf)
+    
+    result = []
+    adapter = ctypes.cast(buf, ctypes.POINTER(IP_ADAPTER_ADDRESSES))
+    while adapter:
+        info = adapter.contents
+        name = info.FriendlyName or (info.AdapterName or b"").decode(errors="replace")
+        unicast = info.FirstUnicastAddress
+        while unicast:
+            addr = _sockaddr_to_ip(unicast.contents.Address)
+            if addr is not None:
+                result.append((name, addr[0], addr[1]))
+            unicast = unicast.contents.Next
+        adapter = info.Next
+    
+    return result